@@ -1,27 +1,24 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 
+import data_loader
+import instrument
+import render_cache
+import snapshot
+
 # Set up Streamlit app layout
 st.set_page_config(layout='wide', page_title='E-Commerce Dashboard', initial_sidebar_state='expanded', page_icon=':clipboard:')
 
 # Sidebar configuration
 st.sidebar.header('E-Commerce Dashboard')
+timer = instrument.RerunTimer('app')
 
-# Load the dataset
-data = pd.read_csv('data.csv', encoding='latin1')
-data['InvoiceDate'] = pd.to_datetime(data['InvoiceDate'])
-data['TotalPrice'] = data['Quantity'] * data['UnitPrice']
+# The default view is served from a snapshot while the data file is unchanged
+view = snapshot.DefaultView('app', [data_loader.TRANSACTIONS_PATH])
 
 st.title(':clipboard: E-Commerce Dashboard')
 st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allow_html=True)
 
-total_sales_revenue = data['TotalPrice'].sum()
-average_order_value = total_sales_revenue / data['InvoiceNo'].nunique()
-total_orders = data['InvoiceNo'].nunique()
-total_customers = data['CustomerID'].nunique()
-
 # Filter options
 st.sidebar.subheader('Sales Revenue Over Time')
 time_filter = st.sidebar.radio('Select Time Period', ('Monthly', 'Daily'))
@@ -32,6 +29,73 @@ num_products = st.sidebar.slider('Select number of top products to display', 5,
 st.sidebar.subheader('Sales by Country')
 num_countries = st.sidebar.slider('Select number of top countries to display', 5, 20, 10)
 
+is_default = (time_filter, num_products, num_countries) == ('Monthly', 10, 10)
+
+
+def compute_view():
+    # Load the dataset, rolled up once per process into daily revenue, totals and
+    # rankings, with the version that keys the rendered figures
+    with timer.stage('load'):
+        rollups, data_version = view.load(lambda: (
+            data_loader.load_transaction_rollups(),
+            data_loader.dataset_version([data_loader.TRANSACTIONS_PATH]),
+        ))
+
+    def draw_sales_over_time(ax):
+        if time_filter == 'Monthly':
+            sales_over_time = rollups['monthly_revenue']
+        else:
+            sales_over_time = rollups['daily_revenue']
+
+        sns.lineplot(x='InvoiceDate', y='TotalPrice', data=sales_over_time, ax=ax)
+        ax.set_title('Sales Revenue Over Time')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Total Revenue ($)')
+
+    def draw_top_products(ax):
+        top_products = rollups['product_quantity'].head(num_products)
+
+        sns.barplot(x='Quantity', y='StockCode', data=top_products, ax=ax)
+        ax.set_title('Top Selling Products')
+        ax.set_xlabel('Quantity Sold')
+        ax.set_ylabel('Product Code')
+
+    def draw_sales_by_country(ax):
+        sales_by_country = rollups['country_revenue'].head(num_countries)
+
+        sns.barplot(x='TotalPrice', y='Country', data=sales_by_country, ax=ax)
+        ax.set_title('Sales by Country')
+        ax.set_xlabel('Total Revenue ($)')
+        ax.set_ylabel('Country')
+
+    # Figures are rendered off pyplot and cached by their inputs, so reruns with
+    # the same widget values reuse the PNG instead of redrawing
+    with timer.stage('render sales_over_time'):
+        sales_over_time_png = render_cache.render_png(('sales_over_time', time_filter, data_version), draw_sales_over_time)
+    with timer.stage('render top_products'):
+        top_products_png = render_cache.render_png(('top_products', num_products, data_version), draw_top_products)
+    with timer.stage('render sales_by_country'):
+        sales_by_country_png = render_cache.render_png(('sales_by_country', num_countries, data_version), draw_sales_by_country)
+
+    return {
+        'metrics': {
+            'total_revenue': float(rollups['total_revenue']),
+            'total_orders': int(rollups['total_orders']),
+            'total_customers': int(rollups['total_customers']),
+        },
+        'sales_over_time': sales_over_time_png,
+        'top_products': top_products_png,
+        'sales_by_country': sales_by_country_png,
+    }
+
+
+outputs = view.outputs(is_default, compute_view)
+
+total_sales_revenue = outputs['metrics']['total_revenue']
+average_order_value = total_sales_revenue / outputs['metrics']['total_orders']
+total_orders = outputs['metrics']['total_orders']
+total_customers = outputs['metrics']['total_customers']
+
 # Main layout
 
 # Row A - Metrics
@@ -46,39 +110,17 @@ col4.metric("Total Number of Customers", total_customers)
 with st.container():
     # Row B - Sales Revenue Over Time
     st.markdown('### Sales Revenue Over Time')
-    if time_filter == 'Monthly':
-        sales_over_time = data.resample('M', on='InvoiceDate').sum()['TotalPrice'].reset_index()
-    else:
-        sales_over_time = data.resample('D', on='InvoiceDate').sum()['TotalPrice'].reset_index()
-
-    fig1, ax1 = plt.subplots(figsize=(12, 4))
-    sns.lineplot(x='InvoiceDate', y='TotalPrice', data=sales_over_time, ax=ax1)
-    ax1.set_title('Sales Revenue Over Time')
-    ax1.set_xlabel('Date')
-    ax1.set_ylabel('Total Revenue ($)')
-    st.pyplot(fig1)
+    st.image(outputs['sales_over_time'], width='stretch')
 
     # Row C - Top Selling Products and Sales by Country side by side
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('### Top Selling Products')
-        top_products = data.groupby('StockCode').agg({'Quantity': 'sum'}).reset_index().sort_values(by='Quantity', ascending=False).head(num_products)
-
-        fig2, ax2 = plt.subplots(figsize=(12, 4))
-        sns.barplot(x='Quantity', y='StockCode', data=top_products, ax=ax2)
-        ax2.set_title('Top Selling Products')
-        ax2.set_xlabel('Quantity Sold')
-        ax2.set_ylabel('Product Code')
-        st.pyplot(fig2)
+        st.image(outputs['top_products'], width='stretch')
 
     with col2:
         st.markdown('### Sales by Country')
-        sales_by_country = data.groupby('Country').agg({'TotalPrice': 'sum'}).reset_index().sort_values(by='TotalPrice', ascending=False).head(num_countries)
-
-        fig3, ax3 = plt.subplots(figsize=(12, 4))
-        sns.barplot(x='TotalPrice', y='Country', data=sales_by_country, ax=ax3)
-        ax3.set_title('Sales by Country')
-        ax3.set_xlabel('Total Revenue ($)')
-        ax3.set_ylabel('Country')
-        st.pyplot(fig3)
+        st.image(outputs['sales_by_country'], width='stretch')
+
+timer.finish()
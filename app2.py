@@ -1,70 +1,68 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
 
+import chart_data
+import data_loader
+import instrument
+import movielens
+import snapshot
+
 # Set up Streamlit app layout
 st.set_page_config(layout='wide', page_title='Movies Dashboard', initial_sidebar_state='expanded', page_icon=':clipboard:')
 
 # Sidebar configuration
 st.sidebar.header('Movies Dashboard')
+timer = instrument.RerunTimer('app2')
+
+# The default view is served from a snapshot while the data files are unchanged
+view = snapshot.DefaultView('app2', [data_loader.MOVIES_PATH, data_loader.RATINGS_PATH, data_loader.USERS_PATH])
+
 
-# Importing the data
-movies_df = pd.read_csv('movies.dat', sep='::', header=None, names=['MovieID', 'Title', 'Genres'], engine='python', encoding='latin1')
-ratings_df = pd.read_csv('ratings.dat', sep='::', header=None, names=['UserID', 'MovieID', 'Rating', 'Timestamp'], engine='python', encoding='latin1')
-users_df = pd.read_csv('users.dat', sep='::', header=None, names=['UserID', 'Gender', 'Age', 'Occupation', 'Zip-code'], engine='python', encoding='latin1')
+def load():
+    # Ratings rolled up per movie, age group and rating, parsed once per process
+    with timer.stage('load'):
+        return view.load(data_loader.load_movielens)
 
-# Merge dataframes
-data = pd.merge(pd.merge(movies_df, ratings_df, on='MovieID'), users_df, on='UserID')
 
-# Create age groups
-age_bins = [0, 18, 25, 35, 45, 50, 56, 60, 100]
-age_labels = ['0-18', '19-25', '26-35', '36-45', '46-50', '51-56', '57-60', '60+']
-data['AgeGroup'] = pd.cut(data['Age'], bins=age_bins, labels=age_labels, right=False)
+widgets = view.widgets(lambda: {'genres': load()[2]['genres']})
 
 # Sidebar filters
 st.sidebar.subheader('Filter by Rating')
 min_rating = st.sidebar.slider('Minimum Rating', 1, 5, 1)
 max_rating = st.sidebar.slider('Maximum Rating', 1, 5, 5)
 
-# Filter data based on rating
-filtered_data = data[(data['Rating'] >= min_rating) & (data['Rating'] <= max_rating)]
-
 # Genre filter
 st.sidebar.subheader('Filter by Genre')
-all_genres = sorted(set(genre for sublist in movies_df['Genres'].str.split('|') for genre in sublist))
+all_genres = widgets['genres']
 selected_genre = st.sidebar.multiselect('Select Genre(s)', all_genres, default=all_genres)
 
-# Filter data based on genre
-def genre_filter(row):
-    genres = row['Genres'].split('|')
-    return any(genre in genres for genre in selected_genre)
+is_default = (min_rating, max_rating, selected_genre) == (1, 5, all_genres)
 
-filtered_data = filtered_data[filtered_data.apply(genre_filter, axis=1)]
 
-# Main layout
-st.title(':clipboard: Movies Dashboard')
-st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allow_html=True)
+def compute_view():
+    movies_df, users_df, genre_index, rating_cube = load()
 
-# Key Metrics
-st.markdown('### Key Metrics')
-total_movies = movies_df['MovieID'].nunique()
-total_users = users_df['UserID'].nunique()
-total_ratings = ratings_df['Rating'].count()
-average_rating = ratings_df['Rating'].mean()
+    # Filter the rating cube by rating range and genre (one bitwise test per movie)
+    with timer.stage('genre filter', rows_in=len(movies_df)) as stage:
+        matching_movies = movielens.movies_matching(genre_index, selected_genre)
+        stage['rows_out'] = int(matching_movies.sum())
+    with timer.stage('slice cube'):
+        rating_counts, rating_values = movielens.slice_cube(rating_cube, matching_movies, min_rating, max_rating)
 
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Total Movies", total_movies)
-col2.metric("Total Users", total_users)
-col3.metric("Total Ratings", total_ratings)
-col4.metric("Average Rating", f"{average_rating:.2f}")
+    metrics = {
+        'total_movies': int(movies_df['MovieID'].nunique()),
+        'total_users': int(users_df['UserID'].nunique()),
+        'total_ratings': rating_cube['total_ratings'],
+        'average_rating': rating_cube['average_rating'],
+    }
 
-# Create a container for the charts
-with st.container():
-    # Genre Distribution
+    with timer.stage('aggregate'):
+        genre_counts = genre_index['counts'].reset_index()
+        genre_counts.columns = ['Genre', 'Count']
+        top_rated_movies = movielens.top_rated(rating_cube, rating_counts, rating_values)
+        age_group_ratings = movielens.ratings_by_age_group(rating_counts, rating_values)
 
-    genre_counts = movies_df['Genres'].str.get_dummies('|').sum().sort_values(ascending=False).reset_index()
-    genre_counts.columns = ['Genre', 'Count']
-    
+    # Genre Distribution
     genre_chart = alt.Chart(genre_counts).mark_bar().encode(
         x=alt.X('Count:Q', title='Number of Movies'),
         y=alt.Y('Genre:N', sort='-x')
@@ -73,12 +71,8 @@ with st.container():
         width=400,
         height=300
     )
-    
-    # Top Rated Movies
 
-    top_rated_movies = filtered_data.groupby('Title').agg({'Rating': 'mean', 'MovieID': 'count'}).reset_index().rename(columns={'MovieID': 'RatingCount'})
-    top_rated_movies = top_rated_movies[top_rated_movies['RatingCount'] > 10].sort_values(by='Rating', ascending=False).head(10)
-    
+    # Top Rated Movies
     top_rated_chart = alt.Chart(top_rated_movies).mark_bar().encode(
         x=alt.X('Rating:Q', title='Average Rating'),
         y=alt.Y('Title:N', sort='-x')
@@ -87,11 +81,8 @@ with st.container():
         width=400,
         height=300
     )
-    
-    # Ratings by Age Group
 
-    age_group_ratings = filtered_data.groupby('AgeGroup').agg({'Rating': 'mean', 'UserID': 'count'}).reset_index().rename(columns={'UserID': 'RatingCount'})
-    
+    # Ratings by Age Group
     age_group_chart = alt.Chart(age_group_ratings).mark_bar().encode(
         x=alt.X('AgeGroup:N', title='Age Group'),
         y=alt.Y('Rating:Q', title='Average Rating')
@@ -101,12 +92,44 @@ with st.container():
         height=300
     )
 
+    with timer.stage('chart json'):
+        charts = {name: chart_data.spec(chart) for name, chart in [
+            ('genre_chart', genre_chart),
+            ('top_rated_chart', top_rated_chart),
+            ('age_group_chart', age_group_chart),
+        ]}
+    return {'metrics': metrics, **charts}
+
+
+outputs = view.outputs(is_default, compute_view)
+
+# Main layout
+st.title(':clipboard: Movies Dashboard')
+st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allow_html=True)
+
+# Key Metrics
+st.markdown('### Key Metrics')
+total_movies = outputs['metrics']['total_movies']
+total_users = outputs['metrics']['total_users']
+total_ratings = outputs['metrics']['total_ratings']
+average_rating = outputs['metrics']['average_rating']
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Total Movies", total_movies)
+col2.metric("Total Users", total_users)
+col3.metric("Total Ratings", total_ratings)
+col4.metric("Average Rating", f"{average_rating:.2f}")
+
+# Create a container for the charts
+with st.container():
     # Place the charts side by side
     left_col, right_col = st.columns(2)
-    
+
     with left_col:
-        st.altair_chart(genre_chart, use_container_width=True)
-        st.altair_chart(age_group_chart, use_container_width=True)
-        
+        st.vega_lite_chart(spec=outputs['genre_chart'], width='stretch')
+        st.vega_lite_chart(spec=outputs['age_group_chart'], width='stretch')
+
     with right_col:
-        st.altair_chart(top_rated_chart, use_container_width=True)
+        st.vega_lite_chart(spec=outputs['top_rated_chart'], width='stretch')
+
+timer.finish()
@@ -1,70 +1,79 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
 
+import chart_data
+import climate
+import data_loader
+import instrument
+import snapshot
+
 # Set up Streamlit app layout
 st.set_page_config(layout='wide', page_title='Climate Change Dashboard', initial_sidebar_state='expanded', page_icon=':earth_americas:')
 
 # Sidebar configuration
 st.sidebar.header('Climate Change Dashboard')
+timer = instrument.RerunTimer('app3')
+
+# The default view is served from a snapshot while the data file is unchanged
+view = snapshot.DefaultView('app3', [data_loader.TEMPERATURES_PATH])
+
+
+def temperature_cube():
+    # Temperatures laid out per city, year and month, parsed once per process
+    with timer.stage('load'):
+        return view.load(data_loader.load_temperature_cube)
+
 
-# Importing the data
-data = pd.read_csv('GlobalLandTemperaturesByMajorCity.csv')
+def default_widgets():
+    cube = temperature_cube()
+    return {
+        'first_year': int(cube['years'][0]),
+        'last_year': int(cube['years'][-1]),
+        'countries': list(cube['countries']),
+    }
 
-# Preprocess the data
-data['dt'] = pd.to_datetime(data['dt'])
-data['year'] = data['dt'].dt.year
-data['month'] = data['dt'].dt.month
-data['Anomaly'] = data['AverageTemperature'] - data['AverageTemperature'].mean()
+
+widgets = view.widgets(default_widgets)
+first_year, last_year = widgets['first_year'], widgets['last_year']
 
 # Sidebar filters
 st.sidebar.subheader('Filter by Year')
-min_year = st.sidebar.slider('Start Year', int(data['year'].min()), int(data['year'].max()), int(data['year'].min()))
-max_year = st.sidebar.slider('End Year', int(data['year'].min()), int(data['year'].max()), int(data['year'].max()))
-
-# Filter data based on year
-filtered_data = data[(data['year'] >= min_year) & (data['year'] <= max_year)]
+min_year = st.sidebar.slider('Start Year', first_year, last_year, first_year)
+max_year = st.sidebar.slider('End Year', first_year, last_year, last_year)
 
 # Sidebar filters for countries
 st.sidebar.subheader('Filter by Country')
-countries = sorted(data['Country'].unique())
+countries = widgets['countries']
 selected_countries = st.sidebar.multiselect('Select Country(ies)', countries, default=countries)
 
-# Filter data based on selected countries
-filtered_data = filtered_data[filtered_data['Country'].isin(selected_countries)]
+is_default = (min_year, max_year, selected_countries) == (first_year, last_year, countries)
 
-# Main layout
-st.title(':earth_americas: Climate Change Dashboard')
-st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allow_html=True)
 
-# Key Metrics
-st.markdown('### Key Metrics')
-total_cities = filtered_data['City'].nunique()
-total_countries = filtered_data['Country'].nunique()
-total_records = filtered_data.shape[0]
+def compute_view():
+    cube = temperature_cube()
 
-col1, col2, col3 = st.columns(3)
-col1.metric("Total Cities", total_cities)
-col2.metric("Total Countries", total_countries)
-col3.metric("Total Records", total_records)
+    # Slice the cube by year range and country; every panel below reads this slice
+    with timer.stage('slice cube') as stage:
+        cells = climate.slice_cube(cube, min_year, max_year, selected_countries)
+        stage['rows_out'] = int(cells['rows'].sum())
 
-# Create a container for the charts
-with st.container():
-    # Line Chart for Temperature Trends
-    st.header("Global Temperature Trends")
-    line_chart = alt.Chart(filtered_data).mark_line().encode(
+    with timer.stage('aggregate'):
+        yearly_avg = climate.yearly_means(cells)
+        monthly_avg = climate.monthly_means(cells)
+        # Yearly mean anomaly per city against its own 1951-1980 climatology
+        anomaly_points = chart_data.downsample(climate.city_anomalies(cube, cells), ['year', 'Anomaly', 'City', 'Country'])
+        country_avg = climate.country_means(cube, cells)
+        # Quartiles of each city's monthly temperatures
+        city_box_stats = climate.city_box_stats(cube, cells)
+
+    line_chart = alt.Chart(yearly_avg).mark_line().encode(
         x=alt.X('year:O', title='Year', axis=alt.Axis(format='d')),
-        y='mean(AverageTemperature):Q'
+        y=alt.Y('AverageTemperature:Q', title='Mean of AverageTemperature')
     ).properties(
         title='Average Global Temperature Over Time',
         width=800,
         height=400
     )
-    st.altair_chart(line_chart, use_container_width=True)
-
-    # Bar Chart for Monthly Temperature Averages
-    st.header("Monthly Temperature Averages")
-    monthly_avg = filtered_data.groupby('month')['AverageTemperature'].mean().reset_index()
     bar_chart = alt.Chart(monthly_avg).mark_bar().encode(
         x=alt.X('month:O', title='Month'),
         y='AverageTemperature:Q'
@@ -73,11 +82,7 @@ with st.container():
         width=800,
         height=400
     )
-    st.altair_chart(bar_chart, use_container_width=True)
-
-    # Scatter Plot for Temperature Anomalies
-    st.header("Temperature Anomalies")
-    scatter_plot = alt.Chart(filtered_data).mark_circle(size=60).encode(
+    scatter_plot = alt.Chart(anomaly_points).mark_circle(size=60).encode(
         x=alt.X('year:O', title='Year', axis=alt.Axis(format='d')),
         y='Anomaly:Q',
         color='Country:N',
@@ -87,11 +92,6 @@ with st.container():
         width=800,
         height=400
     )
-    st.altair_chart(scatter_plot, use_container_width=True)
-
-    # Pie Chart for Country-wise Temperature Distribution
-    st.header("Country-wise Temperature Distribution")
-    country_avg = filtered_data.groupby('Country')['AverageTemperature'].mean().reset_index()
     pie_chart = alt.Chart(country_avg).mark_arc().encode(
         theta=alt.Theta(field="AverageTemperature", type="quantitative"),
         color=alt.Color(field="Country", type="nominal"),
@@ -101,18 +101,77 @@ with st.container():
         width=400,
         height=400
     )
-    st.altair_chart(pie_chart, use_container_width=True)
-
-    # Box Plot for Temperature Variability
-    st.header("Temperature Variability by City")
-    box_plot = alt.Chart(filtered_data).mark_boxplot().encode(
+    whiskers = alt.Chart(city_box_stats).mark_rule().encode(
+        x='City:N',
+        y=alt.Y('min:Q', title='AverageTemperature'),
+        y2='max:Q',
+        color='City:N'
+    )
+    boxes = alt.Chart(city_box_stats).mark_bar(size=14).encode(
         x='City:N',
-        y='AverageTemperature:Q',
+        y='q1:Q',
+        y2='q3:Q',
         color='City:N',
-        tooltip=['City', 'AverageTemperature']
-    ).properties(
+        tooltip=['City', 'min', 'q1', 'median', 'q3', 'max']
+    )
+    medians = alt.Chart(city_box_stats).mark_tick(color='white', size=14).encode(
+        x='City:N',
+        y='median:Q'
+    )
+    box_plot = (whiskers + boxes + medians).properties(
         title='Temperature Variability by City',
         width=800,
         height=400
     )
-    st.altair_chart(box_plot, use_container_width=True)
\ No newline at end of file
+
+    with timer.stage('chart json'):
+        charts = {name: chart_data.spec(chart) for name, chart in [
+            ('line_chart', line_chart),
+            ('bar_chart', bar_chart),
+            ('scatter_plot', scatter_plot),
+            ('pie_chart', pie_chart),
+            ('box_plot', box_plot),
+        ]}
+    return {'summary': climate.summary(cube, cells), **charts}
+
+
+outputs = view.outputs(is_default, compute_view)
+
+# Main layout
+st.title(':earth_americas: Climate Change Dashboard')
+st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allow_html=True)
+
+# Key Metrics
+st.markdown('### Key Metrics')
+total_cities = outputs['summary']['cities']
+total_countries = outputs['summary']['countries']
+total_records = outputs['summary']['records']
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Total Cities", total_cities)
+col2.metric("Total Countries", total_countries)
+col3.metric("Total Records", total_records)
+
+# Create a container for the charts
+with st.container():
+    # Line Chart for Temperature Trends
+    st.header("Global Temperature Trends")
+    st.vega_lite_chart(spec=outputs['line_chart'], width='stretch')
+
+    # Bar Chart for Monthly Temperature Averages
+    st.header("Monthly Temperature Averages")
+    st.vega_lite_chart(spec=outputs['bar_chart'], width='stretch')
+
+    # Scatter Plot for Temperature Anomalies
+    st.header("Temperature Anomalies")
+    st.vega_lite_chart(spec=outputs['scatter_plot'], width='stretch')
+
+    # Pie Chart for Country-wise Temperature Distribution
+    st.header("Country-wise Temperature Distribution")
+    st.vega_lite_chart(spec=outputs['pie_chart'], width='stretch')
+
+    # Box Plot for Temperature Variability
+    st.header("Temperature Variability by City")
+    st.vega_lite_chart(spec=outputs['box_plot'], width='stretch')
+
+timer.finish()
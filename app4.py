@@ -1,32 +1,167 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
+import pandas as pd
+
+import chart_data
+import data_loader
+import energy
+import instrument
+import snapshot
 
 # Set up Streamlit app layout
 st.set_page_config(layout='wide', page_title='Sustainable Energy Dashboard', initial_sidebar_state='expanded', page_icon=':bar_chart:')
 
 # Sidebar configuration
 st.sidebar.header('Sustainable Energy Dashboard')
+timer = instrument.RerunTimer('app4')
+
+# The default view is served from a snapshot while the data file is unchanged
+view = snapshot.DefaultView('app4', [data_loader.ENERGY_PATH])
+
+
+def load():
+    with timer.stage('load'):
+        # All three from one version of the file, fetched once per rerun
+        return view.load(lambda: (data_loader.load_energy(), data_loader.energy_filters(), data_loader.load_energy_cube()))
+
+
+def year_mask(data_filters):
+    # Mask cached per year range
+    with timer.stage('filter year'):
+        return data_filters.between('Year', pd.Timestamp(str(min_year)), pd.Timestamp(str(max_year)))
+
+
+def entities_in_years(data_filters):
+    return sorted(data_filters.select(year_mask(data_filters))['Entity'].unique())
+
+
+def default_widgets():
+    data = load()[0]
+    return {
+        'first_year': int(data['Year'].dt.year.min()),
+        'last_year': int(data['Year'].dt.year.max()),
+        'countries': sorted(data['Entity'].unique()),
+    }
 
-# Load the dataset
-data = pd.read_csv('global-data-on-sustainable-energy.csv', encoding='latin1')
-data['Year'] = pd.to_datetime(data['Year'], format='%Y')
 
 # Sidebar filters
 st.sidebar.subheader('Filter by Year')
-min_year = st.sidebar.slider('Start Year', int(data['Year'].dt.year.min()), int(data['Year'].dt.year.max()), int(data['Year'].dt.year.min()))
-max_year = st.sidebar.slider('End Year', int(data['Year'].dt.year.min()), int(data['Year'].dt.year.max()), int(data['Year'].dt.year.max()))
-
-# Filter data based on year
-filtered_data = data[(data['Year'].dt.year >= min_year) & (data['Year'].dt.year <= max_year)]
+widgets = view.widgets(default_widgets)
+first_year, last_year = widgets['first_year'], widgets['last_year']
+min_year = st.sidebar.slider('Start Year', first_year, last_year, first_year)
+max_year = st.sidebar.slider('End Year', first_year, last_year, last_year)
 
-# Sidebar filters for countries
+# Sidebar filters for countries (those with data in the year range)
 st.sidebar.subheader('Filter by Country')
-countries = sorted(filtered_data['Entity'].unique())
+if (min_year, max_year) == (first_year, last_year):
+    countries = widgets['countries']
+else:
+    countries = entities_in_years(load()[1])
 selected_countries = st.sidebar.multiselect('Select Country(ies)', countries, default=countries)
 
-# Filter data based on selected countries
-filtered_data = filtered_data[filtered_data['Entity'].isin(selected_countries)]
+st.sidebar.subheader('Map')
+map_metric = st.sidebar.selectbox('Map Metric', energy.METRICS)
+
+is_default = (min_year, max_year, selected_countries, map_metric) == (first_year, last_year, countries, energy.METRICS[0])
+
+
+def series_chart(energy_cube, cells, metric, title):
+    """Line per entity; past TOP_N entities, the rest are drawn as one band."""
+    top, rest = energy.top_series(energy_cube, cells, metric)
+    lines = alt.Chart(top).mark_line().encode(
+        x=alt.X('Year:T', title='Year'),
+        y=alt.Y(f'{metric}:Q', title=title),
+        color='Entity:N'
+    )
+    if rest is not None:
+        band = alt.Chart(rest).mark_area(opacity=0.3, color='gray').encode(
+            x='Year:T',
+            y='low:Q',
+            y2='high:Q',
+            tooltip=['Entity', alt.Tooltip('low:Q', title='25th percentile'), alt.Tooltip('high:Q', title='75th percentile')]
+        )
+        rest_mean = alt.Chart(rest).mark_line(color='gray', strokeDash=[4, 4]).encode(
+            x='Year:T',
+            y=f'{metric}:Q',
+            tooltip=['Entity', alt.Tooltip(f'{metric}:Q', title='Mean')]
+        )
+        lines = band + rest_mean + lines
+    return lines.properties(
+        width=800,
+        height=400
+    )
+
+
+def compute_view():
+    data, data_filters, energy_cube = load()
+
+    # Filter data based on selected countries (mask cached per selection)
+    with timer.stage('filter country', rows_in=len(data)) as stage:
+        country_mask = data_filters.isin('Entity', selected_countries)
+        filtered_data = data_filters.select(year_mask(data_filters), country_mask)
+        stage['rows_out'] = len(filtered_data)
+
+    # Charts read the per-entity, per-year metric arrays for the same selection
+    with timer.stage('slice cube'):
+        cells = energy.slice_cube(energy_cube, min_year, max_year, selected_countries)
+
+    metrics = {
+        'total_countries': int(filtered_data['Entity'].nunique()),
+        'avg_access_electricity': float(filtered_data['Access to electricity (% of population)'].mean()),
+        'avg_access_clean_fuels': float(filtered_data['Access to clean fuels for cooking'].mean()),
+    }
+
+    with timer.stage('aggregate'):
+        # Top countries plus a band for the rest
+        electricity_chart = series_chart(energy_cube, cells, 'Access to electricity (% of population)', 'Access to Electricity (%)')
+        clean_fuels_chart = series_chart(energy_cube, cells, 'Access to clean fuels for cooking', 'Access to Clean Fuels (%)')
+        # End Year slice, one point per country
+        map_data = energy.map_points(energy_cube, cells, map_metric, max_year)
+        renewable_data = energy.entity_totals(energy_cube, cells, 'Renewable-electricity-generating-capacity-per-capita')
+        financial_aid_data = energy.entity_totals(energy_cube, cells, 'Financial flows to developing countries (US $)')
+
+    map_chart = alt.Chart(map_data).mark_circle(opacity=0.8).encode(
+        longitude='Longitude:Q',
+        latitude='Latitude:Q',
+        size=alt.Size(f'{map_metric}:Q', title=map_metric),
+        color=alt.Color(f'{map_metric}:Q', scale=alt.Scale(scheme='viridis'), title=map_metric),
+        tooltip=['Entity', alt.Tooltip(f'{map_metric}:Q', format=',.2f')]
+    ).project(
+        type='equalEarth'
+    ).properties(
+        title=f'{map_metric} in {max_year}',
+        width=800,
+        height=400
+    )
+    renewable_chart = alt.Chart(renewable_data).mark_bar().encode(
+        x=alt.X('Renewable-electricity-generating-capacity-per-capita:Q', title='Renewable Capacity (Watts per Capita)'),
+        y=alt.Y('Entity:N', sort='-x', title='Country'),
+        tooltip=['Entity', 'Renewable-electricity-generating-capacity-per-capita:Q']
+    ).properties(
+        width=800,
+        height=400
+    )
+    financial_aid_chart = alt.Chart(financial_aid_data).mark_bar().encode(
+        x=alt.X('Financial flows to developing countries (US $):Q', title='Financial Aid (USD)'),
+        y=alt.Y('Entity:N', sort='-x', title='Country'),
+        tooltip=['Entity', 'Financial flows to developing countries (US $):Q']
+    ).properties(
+        width=800,
+        height=400
+    )
+
+    with timer.stage('chart json'):
+        charts = {name: chart_data.spec(chart) for name, chart in [
+            ('electricity_chart', electricity_chart),
+            ('clean_fuels_chart', clean_fuels_chart),
+            ('map_chart', map_chart),
+            ('renewable_chart', renewable_chart),
+            ('financial_aid_chart', financial_aid_chart),
+        ]}
+    return {'metrics': metrics, **charts}
+
+
+outputs = view.outputs(is_default, compute_view)
 
 # Main layout
 st.title(':bar_chart: Sustainable Energy Dashboard')
@@ -34,60 +169,33 @@ st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allo
 
 # Key Metrics
 st.markdown('### Key Metrics')
-total_countries = filtered_data['Entity'].nunique()
-avg_access_electricity = filtered_data['Access to electricity (% of population)'].mean()
-avg_access_clean_fuels = filtered_data['Access to clean fuels for cooking'].mean()
-total_renewable_capacity = filtered_data['Renewable-electricity-generating-capacity-per-capita'].sum()
+total_countries = outputs['metrics']['total_countries']
+avg_access_electricity = outputs['metrics']['avg_access_electricity']
+avg_access_clean_fuels = outputs['metrics']['avg_access_clean_fuels']
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Total Countries", total_countries)
 col2.metric("Avg. Access to Electricity (%)", f"{avg_access_electricity:.2f}")
 col3.metric("Avg. Access to Clean Fuels (%)", f"{avg_access_clean_fuels:.2f}")
 
-# Sales Revenue Over Time
+# Access to Electricity Over Time
 st.header("Access to Electricity Over Time")
-electricity_chart = alt.Chart(filtered_data).mark_line().encode(
-    x=alt.X('Year:T', title='Year'),
-    y=alt.Y('mean(Access to electricity (% of population)):Q', title='Access to Electricity (%)'),
-    color='Entity:N'
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(electricity_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['electricity_chart'], width='stretch')
 
 # Access to Clean Fuels Over Time
 st.header("Access to Clean Fuels Over Time")
-clean_fuels_chart = alt.Chart(filtered_data).mark_line().encode(
-    x=alt.X('Year:T', title='Year'),
-    y=alt.Y('mean(Access to clean fuels for cooking):Q', title='Access to Clean Fuels (%)'),
-    color='Entity:N'
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(clean_fuels_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['clean_fuels_chart'], width='stretch')
+
+# Map by Country
+st.header("Map by Country")
+st.vega_lite_chart(spec=outputs['map_chart'], width='stretch')
 
 # Renewable Electricity Generation by Country
 st.header("Renewable Electricity Generation by Country")
-renewable_chart = alt.Chart(filtered_data).mark_bar().encode(
-    x=alt.X('sum(Renewable-electricity-generating-capacity-per-capita):Q', title='Renewable Capacity (Watts per Capita)'),
-    y=alt.Y('Entity:N', sort='-x', title='Country'),
-    tooltip=['Entity', 'sum(Renewable-electricity-generating-capacity-per-capita):Q']
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(renewable_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['renewable_chart'], width='stretch')
 
 # Financial Aid Distribution
 st.header("Financial Aid Distribution by Country")
-financial_aid_chart = alt.Chart(filtered_data).mark_bar().encode(
-    x=alt.X('sum(Financial flows to developing countries (US $)):Q', title='Financial Aid (USD)'),
-    y=alt.Y('Entity:N', sort='-x', title='Country'),
-    tooltip=['Entity', 'sum(Financial flows to developing countries (US $)):Q']
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(financial_aid_chart, use_container_width=True)
\ No newline at end of file
+st.vega_lite_chart(spec=outputs['financial_aid_chart'], width='stretch')
+
+timer.finish()
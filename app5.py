@@ -1,48 +1,112 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
 
+import chart_data
+import data_loader
+import instrument
+import realtor
+import snapshot
+
 # Set up Streamlit app layout
 st.set_page_config(layout='wide', page_title='USA Real Estate Dashboard', initial_sidebar_state='expanded', page_icon=':house:')
 
 # Sidebar configuration
 st.sidebar.header('USA Real Estate Dashboard')
+timer = instrument.RerunTimer('app5')
+
+# The default view is served from a snapshot while the data file is unchanged
+view = snapshot.DefaultView('app5', [data_loader.REALTOR_PATH])
+
+
+def load():
+    # The streamed dataset: per-state price sketches plus the cleaned rows for out-of-core queries
+    with timer.stage('load'):
+        return view.load(data_loader.load_realtor)
 
-# Load the dataset
-data = pd.read_csv('realtor-data.zip.csv')
-data['price'] = pd.to_numeric(data['price'], errors='coerce')
-data['bed'] = pd.to_numeric(data['bed'], errors='coerce')
-data['bath'] = pd.to_numeric(data['bath'], errors='coerce')
-data['state'] = data['state'].astype(str)
-data['city'] = data['city'].fillna('Unknown')
 
-# Handle missing values for prices, beds, and baths
-data = data.dropna(subset=['price', 'bed', 'bath'])
+def default_widgets():
+    realtor_data = load()
+    price_lo, price_hi = int(realtor_data['price_min']), int(realtor_data['price_max'])
+    return {
+        'price_lo': price_lo,
+        'price_hi': price_hi,
+        'states': realtor.states_in_range(realtor_data, price_lo, price_hi),
+    }
 
-# Remove unrealistic prices, beds, and baths
-data = data[(data['price'] > 0) & (data['price'] < 1e8)]
-data = data[(data['bed'] > 0) & (data['bed'] < 10)]
-data = data[(data['bath'] >= 0) & (data['bath'] < 10)]
+
+widgets = view.widgets(default_widgets)
+price_lo, price_hi = widgets['price_lo'], widgets['price_hi']
 
 # Sidebar filters
 st.sidebar.subheader('Filter by Price Range')
-min_price = st.sidebar.slider('Minimum Price', int(data['price'].min()), int(data['price'].max()), int(data['price'].min()))
-max_price = st.sidebar.slider('Maximum Price', int(data['price'].min()), int(data['price'].max()), int(data['price'].max()))
-
-# Filter data based on price range
-filtered_data = data[(data['price'] >= min_price) & (data['price'] <= max_price)]
+min_price = st.sidebar.slider('Minimum Price', price_lo, price_hi, price_lo)
+max_price = st.sidebar.slider('Maximum Price', price_lo, price_hi, price_hi)
 
-# Sidebar filters for states
+# Sidebar filters for states (those with listings in the price range)
 st.sidebar.subheader('Filter by State')
-states = sorted(filtered_data['state'].dropna().unique())
+if (min_price, max_price) == (price_lo, price_hi):
+    states = widgets['states']
+else:
+    states = realtor.states_in_range(load(), min_price, max_price)
 selected_states = st.sidebar.multiselect('Select State(s)', states, default=states)
 
-# Filter data based on selected states
-filtered_data = filtered_data[filtered_data['state'].isin(selected_states)]
-
-# Sample data to reduce size
-if len(filtered_data) > 10000:
-    filtered_data = filtered_data.sample(n=10000, random_state=42)
+is_default = (min_price, max_price, selected_states) == (price_lo, price_hi, states)
+
+
+def compute_view():
+    realtor_data = load()
+
+    # Metrics, listings and city averages are filtered and grouped over every
+    # listing by the query backend; the price distribution is merged from the
+    # per-state price sketches
+    with timer.stage('aggregate') as stage:
+        price_summary = realtor.price_summary(realtor_data, selected_states, min_price, max_price)
+        price_bins = realtor.price_histogram(realtor_data, selected_states, min_price, max_price, bins=100)
+        # Cities with the most listings, enough to fill the chart
+        avg_price_data = realtor.city_averages(realtor_data, selected_states, min_price, max_price, limit=chart_data.MAX_CHART_ROWS)
+        state_listings = realtor.listings_by_state(realtor_data, selected_states, min_price, max_price)
+        stage['rows_out'] = len(avg_price_data)
+
+    price_distribution_chart = alt.Chart(price_bins).mark_line().encode(
+        x=alt.X('bin_start:Q', title='Price ($)'),
+        y=alt.Y('count:Q', title='Number of Properties')
+    ).properties(
+        width=800,
+        height=400
+    )
+    geo_distribution_chart = alt.Chart(avg_price_data).mark_circle(size=60).encode(
+        x=alt.X('state:N', title='State'),
+        y=alt.Y('city:N', title='City', sort=alt.EncodingSortField(field="price", op="mean", order="descending")),
+        size=alt.Size('price:Q', scale=alt.Scale(range=[10, 1000]), title='Average Price ($)'),
+        color='state:N',
+        tooltip=[
+            'state', 'city',
+            alt.Tooltip('price:Q', title='Avg. Price'),
+            alt.Tooltip('bed:Q', title='Avg. Beds', format=',.0f'),
+            alt.Tooltip('bath:Q', title='Avg. Baths', format=',.0f')
+        ]
+    ).properties(
+        width=800,
+        height=400
+    ).interactive()
+    top_states_chart = alt.Chart(state_listings).mark_bar().encode(
+        x=alt.X('listings:Q', title='Number of Listings'),
+        y=alt.Y('state:N', sort='-x', title='State')
+    ).properties(
+        width=800,
+        height=400
+    )
+
+    with timer.stage('chart json'):
+        charts = {name: chart_data.spec(chart) for name, chart in [
+            ('price_distribution_chart', price_distribution_chart),
+            ('geo_distribution_chart', geo_distribution_chart),
+            ('top_states_chart', top_states_chart),
+        ]}
+    return {'price_summary': {k: float(v) for k, v in price_summary.items()}, **charts}
+
+
+outputs = view.outputs(is_default, compute_view)
 
 # Main layout
 st.title(':house: USA Real Estate Dashboard')
@@ -50,10 +114,11 @@ st.markdown('<style>div.block-container{padding-top:1rem;}</style>', unsafe_allo
 
 # Key Metrics
 st.markdown('### Key Metrics')
-total_properties = filtered_data.shape[0]
-average_price = filtered_data['price'].mean()
-median_price = filtered_data['price'].median()
-total_listings = filtered_data['price'].count()
+price_summary = outputs['price_summary']
+total_properties = int(price_summary['count'])
+average_price = price_summary['mean']
+median_price = price_summary['median']
+total_listings = int(price_summary['count'])
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Properties", total_properties)
@@ -63,48 +128,14 @@ col4.metric("Total Listings", total_listings)
 
 # Distribution of Property Prices as Line Chart
 st.header("Distribution of Property Prices")
-price_distribution_chart = alt.Chart(filtered_data).mark_line().encode(
-    x=alt.X('price:Q', bin=alt.Bin(maxbins=100), title='Price ($)'),
-    y=alt.Y('count():Q', title='Number of Properties')
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(price_distribution_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['price_distribution_chart'], width='stretch')
 
 # Property Prices by State and City
 st.header("Property Prices by State and City")
-avg_price_data = filtered_data.groupby(['state', 'city']).agg({
-    'price': 'mean',
-    'bed': 'mean',
-    'bath': 'mean'
-}).reset_index()
-
-geo_distribution_chart = alt.Chart(avg_price_data).mark_circle(size=60).encode(
-    x=alt.X('state:N', title='State'),
-    y=alt.Y('city:N', title='City', sort=alt.EncodingSortField(field="price", op="mean", order="descending")),
-    size=alt.Size('price:Q', scale=alt.Scale(range=[10, 1000]), title='Average Price ($)'),
-    color='state:N',
-    tooltip=[
-        'state', 'city', 
-        alt.Tooltip('price:Q', title='Avg. Price'),
-        alt.Tooltip('bed:Q', title='Avg. Beds', format=',.0f'),
-        alt.Tooltip('bath:Q', title='Avg. Baths', format=',.0f')
-    ]
-).properties(
-    width=800,
-    height=400
-).interactive()
-
-st.altair_chart(geo_distribution_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['geo_distribution_chart'], width='stretch')
 
 # Top States by Listings
 st.header("Top States by Listings")
-top_states_chart = alt.Chart(filtered_data).mark_bar().encode(
-    x=alt.X('count(price):Q', title='Number of Listings'),
-    y=alt.Y('state:N', sort='-x', title='State')
-).properties(
-    width=800,
-    height=400
-)
-st.altair_chart(top_states_chart, use_container_width=True)
+st.vega_lite_chart(spec=outputs['top_states_chart'], width='stretch')
+
+timer.finish()
@@ -0,0 +1,188 @@
+"""Benchmark every dashboard headlessly on synthetic data.
+
+Each app runs in a fresh subprocess through Streamlit's AppTest, so cold
+start and peak RSS are measured per app. The results table is printed to
+stdout and, with --output, appended as JSON lines.
+
+    python -m benchmarks.run --scale 1 10 --apps app2.py app5.py --output bench.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import realtor
+import snapshot
+from benchmarks import synthetic
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'benchmarks', 'data')
+APPS = ['app.py', 'app2.py', 'app3.py', 'app4.py', 'app5.py']
+
+
+def _slider_at(fraction):
+    def value(widget):
+        return int(widget.min + (widget.max - widget.min) * fraction)
+    value.description = f'{fraction:.0%} of range'
+    return value
+
+
+def _first_options(n):
+    def value(widget):
+        return list(widget.options[:n])
+    value.description = f'first {n} options'
+    return value
+
+
+def _option(option):
+    def value(widget):
+        return option
+    value.description = repr(option)
+    return value
+
+
+# Scripted interactions per app: (widget type, widget index, new value)
+INTERACTIONS = {
+    'app.py': [
+        ('radio', 0, _option('Daily')),
+        ('slider', 0, _slider_at(0.5)),
+        ('slider', 1, _slider_at(1.0)),
+        ('radio', 0, _option('Monthly')),
+    ],
+    'app2.py': [
+        ('slider', 0, _slider_at(0.5)),
+        ('slider', 1, _slider_at(0.75)),
+        ('multiselect', 0, _first_options(3)),
+        ('slider', 0, _slider_at(0.0)),
+    ],
+    'app3.py': [
+        ('slider', 0, _slider_at(0.5)),
+        ('multiselect', 0, _first_options(10)),
+        ('slider', 1, _slider_at(0.9)),
+    ],
+    'app4.py': [
+        ('slider', 0, _slider_at(0.5)),
+        ('multiselect', 0, _first_options(10)),
+        ('slider', 1, _slider_at(0.9)),
+    ],
+    'app5.py': [
+        ('slider', 1, _slider_at(0.01)),
+        ('multiselect', 0, _first_options(5)),
+        ('slider', 0, _slider_at(0.001)),
+    ],
+}
+
+
+def _peak_rss_mb():
+    # VmHWM is reset on exec; ru_maxrss can carry over the parent's peak from fork
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _errors(at):
+    return [str(e.value) for e in at.exception]
+
+
+def run_app(app, data_dir, timeout):
+    """Drive one app through its interactions in this process and return the timings."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(data_dir)
+    sys.path.insert(0, REPO_DIR)
+
+    started = time.perf_counter()
+    at = AppTest.from_file(os.path.join(REPO_DIR, app), default_timeout=timeout).run()
+    result = {
+        'app': app,
+        'cold_start_s': time.perf_counter() - started,
+        'interactions': [],
+        'errors': _errors(at),
+    }
+
+    for kind, index, value in INTERACTIONS.get(app, []):
+        widget = getattr(at, kind)[index]
+        new_value = value(widget)
+        started = time.perf_counter()
+        widget.set_value(new_value).run()
+        result['interactions'].append({
+            'widget': f'{widget.label} -> {value.description}',
+            'latency_s': time.perf_counter() - started,
+        })
+        result['errors'].extend(_errors(at))
+
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def _run_in_subprocess(app, data_dir, timeout):
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', '--child', app, '--data-dir', data_dir, '--timeout', str(timeout)],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode or not lines:
+        return {'app': app, 'errors': [completed.stderr.strip()[-2000:] or f'exit code {completed.returncode}']}
+    return json.loads(lines[-1])
+
+
+def _report(result):
+    if 'cold_start_s' not in result:
+        print(f"{result['app']:<8} FAILED: {result['errors'][0]}")
+        return
+    latencies = sorted(i['latency_s'] for i in result['interactions'])
+    worst = latencies[-1] if latencies else float('nan')
+    mean = sum(latencies) / len(latencies) if latencies else float('nan')
+    print(f"{result['app']:<8} scale {result['scale']:<5} cold start {result['cold_start_s']:7.2f}s   "
+          f"interaction mean {mean:6.3f}s max {worst:6.3f}s   peak RSS {result['peak_rss_mb']:8.1f} MB")
+    for error in result['errors']:
+        print(f'         error: {error}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, nargs='+', default=[1], help='dataset sizes relative to the public datasets')
+    parser.add_argument('--apps', nargs='+', default=APPS)
+    parser.add_argument('--data-dir', default=DATA_DIR, help='where synthetic datasets are generated and reused')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600, help='per-rerun timeout in seconds')
+    parser.add_argument('--keep-sidecars', action='store_true', help='reuse Arrow sidecars and Parquet rows instead of timing a text parse')
+    parser.add_argument('--keep-snapshots', action='store_true', help='serve default views from snapshots instead of timing their computation')
+    parser.add_argument('--output', help='append results to this JSON lines file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_app(args.child, args.data_dir, args.timeout)))
+        return
+
+    for scale in args.scale:
+        data_dir = synthetic.generate(os.path.join(args.data_dir, f'scale-{scale:g}'), scale, args.seed)
+        for app in args.apps:
+            if not args.keep_sidecars:
+                for pattern in ['*.arrow', f'*{realtor.ROWS_SUFFIX}']:
+                    for sidecar in glob.glob(os.path.join(data_dir, pattern)):
+                        os.remove(sidecar)
+            if not args.keep_snapshots:
+                for stored in glob.glob(os.path.join(data_dir, snapshot.SNAPSHOT_DIR, '*.json')):
+                    os.remove(stored)
+            result = _run_in_subprocess(app, data_dir, args.timeout)
+            result['scale'] = scale
+            _report(result)
+            if args.output:
+                with open(args.output, 'a') as f:
+                    f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows at scale 1, roughly the size of the public datasets the dashboards were built for
+TRANSACTIONS_ROWS = 541_909
+MOVIES_ROWS = 3_883
+USERS_ROWS = 6_040
+RATINGS_ROWS = 1_000_209
+TEMPERATURE_CITIES = 100
+ENERGY_ENTITIES = 176
+REALTOR_ROWS = 2_226_382
+
+# Files are written in chunks so 100x datasets never sit in memory at once
+CHUNK_ROWS = 1_000_000
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', "Children's", 'Comedy', 'Crime', 'Documentary', 'Drama', 'Fantasy',
+    'Film-Noir', 'Horror', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western',
+]
+STATES = [
+    'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado', 'Connecticut', 'Delaware', 'Florida',
+    'Georgia', 'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa', 'Kansas', 'Kentucky', 'Louisiana', 'Maine',
+    'Maryland', 'Massachusetts', 'Michigan', 'Minnesota', 'Mississippi', 'Missouri', 'Montana', 'Nebraska',
+    'Nevada', 'New Hampshire', 'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota', 'Ohio',
+    'Oklahoma', 'Oregon', 'Pennsylvania', 'Puerto Rico', 'Rhode Island', 'South Carolina', 'South Dakota',
+    'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming',
+]
+
+
+def _chunks(total):
+    for start in range(0, total, CHUNK_ROWS):
+        yield min(CHUNK_ROWS, total - start)
+
+
+def _write_dat(path, frames):
+    """Write frames as MovieLens '::'-separated lines."""
+    with open(path, 'w', encoding='latin1') as f:
+        for frame in frames:
+            lines = frame.iloc[:, 0].astype(str)
+            for column in frame.columns[1:]:
+                lines = lines + '::' + frame[column].astype(str)
+            f.write('\n'.join(lines) + '\n')
+
+
+def write_transactions(directory, scale, rng):
+    rows = int(TRANSACTIONS_ROWS * scale)
+    n_invoices = max(rows // 20, 1)
+    n_products = max(int(4_000 * scale ** 0.5), 1)
+    n_customers = max(int(4_372 * scale ** 0.5), 1)
+    countries = ['United Kingdom'] * 30 + [f'Country {i:02d}' for i in range(37)]
+    stock_codes = np.array([f'{85000 + i}{"ABC"[i % 3] if i % 4 else ""}' for i in range(n_products)])
+    start = pd.Timestamp('2010-12-01').value // 60_000_000_000
+    minutes = int((pd.Timestamp('2011-12-09') - pd.Timestamp('2010-12-01')).total_seconds() // 60)
+
+    path = os.path.join(directory, 'data.csv')
+    for i, n in enumerate(_chunks(rows)):
+        invoice = rng.integers(0, n_invoices, n)
+        cancelled = rng.random(n) < 0.02
+        product = rng.integers(0, n_products, n)
+        customer = rng.integers(12_346, 12_346 + n_customers, n).astype(float)
+        customer[rng.random(n) < 0.25] = np.nan
+        invoice_minute = start + invoice * minutes // n_invoices
+        frame = pd.DataFrame({
+            'InvoiceNo': np.where(cancelled, 'C', '') + (536_365 + invoice).astype(str),
+            'StockCode': stock_codes[product],
+            'Description': np.char.add('PRODUCT ', product.astype(str)),
+            'Quantity': np.where(cancelled, -1, 1) * rng.integers(1, 25, n),
+            'InvoiceDate': pd.to_datetime(invoice_minute, unit='m').strftime('%m/%d/%Y %H:%M'),
+            'UnitPrice': rng.lognormal(0.8, 0.9, n).round(2),
+            'CustomerID': customer,
+            'Country': np.array(countries)[rng.integers(0, len(countries), n)],
+        })
+        frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False, encoding='latin1')
+    return path
+
+
+def write_movielens(directory, scale, rng):
+    n_movies = int(MOVIES_ROWS * scale)
+    n_users = int(USERS_ROWS * scale)
+    # MovieLens IDs have gaps; keep that so ID-indexed lookups are exercised
+    movie_ids = np.sort(rng.choice(np.arange(1, int(n_movies * 1.02) + 2), n_movies, replace=False))
+    genre_sets = [
+        '|'.join(sorted(rng.choice(GENRES, rng.integers(1, 4), replace=False)))
+        for _ in range(n_movies)
+    ]
+    movies = pd.DataFrame({
+        'MovieID': movie_ids,
+        'Title': [f'Movie {i} ({year})' for i, year in zip(movie_ids, rng.integers(1919, 2001, n_movies))],
+        'Genres': genre_sets,
+    })
+    _write_dat(os.path.join(directory, 'movies.dat'), [movies])
+
+    users = pd.DataFrame({
+        'UserID': np.arange(1, n_users + 1),
+        'Gender': rng.choice(['F', 'M'], n_users, p=[0.28, 0.72]),
+        'Age': rng.choice([1, 18, 25, 35, 45, 50, 56], n_users),
+        'Occupation': rng.integers(0, 21, n_users),
+        'Zip-code': [f'{z:05d}' for z in rng.integers(0, 100_000, n_users)],
+    })
+    _write_dat(os.path.join(directory, 'users.dat'), [users])
+
+    # Popular movies get most of the ratings, as in the real data
+    popularity = rng.zipf(1.3, n_movies).astype(float)
+    popularity /= popularity.sum()
+
+    def ratings():
+        for n in _chunks(int(RATINGS_ROWS * scale)):
+            yield pd.DataFrame({
+                'UserID': rng.integers(1, n_users + 1, n),
+                'MovieID': movie_ids[rng.choice(n_movies, n, p=popularity)],
+                'Rating': rng.choice([1, 2, 3, 4, 5], n, p=[0.06, 0.11, 0.26, 0.35, 0.22]),
+                'Timestamp': rng.integers(956_703_932, 1_046_454_590, n),
+            })
+
+    _write_dat(os.path.join(directory, 'ratings.dat'), ratings())
+    return directory
+
+
+def write_temperatures(directory, scale, rng):
+    n_cities = int(TEMPERATURE_CITIES * scale)
+    dates = pd.date_range('1813-01-01', '2013-09-01', freq='MS')
+    months = dates.month.to_numpy()
+    years = dates.year.to_numpy()
+
+    path = os.path.join(directory, 'GlobalLandTemperaturesByMajorCity.csv')
+    for city in range(n_cities):
+        latitude = rng.uniform(-40, 60)
+        base = 28 - abs(latitude) * 0.4
+        swing = abs(latitude) * 0.25 * (1 if latitude >= 0 else -1)
+        temperature = base - swing * np.cos((months - 1) / 12 * 2 * np.pi) + (years - 1900) * 0.01 + rng.normal(0, 0.8, len(dates))
+        temperature[rng.random(len(dates)) < 0.04] = np.nan
+        longitude = rng.uniform(-180, 180)
+        frame = pd.DataFrame({
+            'dt': dates.strftime('%Y-%m-%d'),
+            'AverageTemperature': temperature.round(3),
+            'AverageTemperatureUncertainty': rng.uniform(0.1, 3, len(dates)).round(3),
+            'City': f'City {city:04d}',
+            'Country': f'Country {city % max(n_cities // 2, 1):03d}',
+            'Latitude': f'{abs(latitude):.2f}{"N" if latitude >= 0 else "S"}',
+            'Longitude': f'{abs(longitude):.2f}{"E" if longitude >= 0 else "W"}',
+        })
+        frame.to_csv(path, mode='w' if city == 0 else 'a', header=city == 0, index=False)
+    return path
+
+
+def write_energy(directory, scale, rng):
+    n_entities = int(ENERGY_ENTITIES * scale)
+    years = np.arange(2000, 2021)
+    entity = np.repeat(np.arange(n_entities), len(years))
+    year = np.tile(years, n_entities)
+    n = len(entity)
+    progress = (year - 2000) / 20
+
+    def share(start):
+        return np.clip(start[entity] + progress * rng.uniform(0, 40, n_entities)[entity] + rng.normal(0, 1, n), 0, 100)
+
+    def sparse(values, missing=0.1):
+        values = values.astype(float)
+        values[rng.random(n) < missing] = np.nan
+        return values
+
+    frame = pd.DataFrame({
+        'Entity': np.array([f'Country {i:03d}' for i in range(n_entities)])[entity],
+        'Year': year,
+        'Access to electricity (% of population)': share(rng.uniform(1, 100, n_entities)),
+        'Access to clean fuels for cooking': sparse(share(rng.uniform(0, 100, n_entities)), 0.05),
+        'Renewable-electricity-generating-capacity-per-capita': sparse(rng.gamma(1, 100, n), 0.25),
+        'Financial flows to developing countries (US $)': sparse(rng.gamma(0.5, 2e7, n), 0.55),
+        'Renewable energy share in the total final energy consumption (%)': sparse(share(rng.uniform(0, 90, n_entities))),
+        'Electricity from fossil fuels (TWh)': rng.gamma(0.5, 50, n).round(2),
+        'Electricity from nuclear (TWh)': sparse(rng.gamma(0.2, 20, n).round(2)),
+        'Electricity from renewables (TWh)': rng.gamma(0.5, 20, n).round(2),
+        'Low-carbon electricity (% electricity)': share(rng.uniform(0, 100, n_entities)),
+        'Primary energy consumption per capita (kWh/person)': rng.gamma(1, 25_000, n),
+        'Energy intensity level of primary energy (MJ/$2017 PPP GDP)': sparse(rng.uniform(0.1, 30, n)),
+        'Value_co2_emissions_kt_by_country': sparse(rng.gamma(0.5, 2e5, n)),
+        'Renewables (% equivalent primary energy)': sparse(share(rng.uniform(0, 80, n_entities)), 0.6),
+        'gdp_growth': sparse(rng.normal(3, 4, n)),
+        'gdp_per_capita': sparse(rng.gamma(1, 15_000, n)),
+        'Density\n(P/Km2)': np.array([f'{d:,}' for d in rng.integers(2, 8_000, n_entities)])[entity],
+        'Land Area(Km2)': rng.integers(20, 10_000_000, n_entities)[entity],
+        'Latitude': rng.uniform(-41, 65, n_entities)[entity],
+        'Longitude': rng.uniform(-175, 178, n_entities)[entity],
+    })
+    path = os.path.join(directory, 'global-data-on-sustainable-energy.csv')
+    frame.to_csv(path, index=False, encoding='latin1')
+    return path
+
+
+def write_realtor(directory, scale, rng):
+    states = np.array(STATES)
+    cities = np.array([f'City {i:04d}' for i in range(2_000)])
+    path = os.path.join(directory, 'realtor-data.zip.csv')
+    for i, n in enumerate(_chunks(int(REALTOR_ROWS * scale))):
+        price = rng.lognormal(12.7, 0.9, n).round(-2)
+        price[rng.random(n) < 0.01] = np.nan
+        bed = rng.integers(1, 7, n).astype(float)
+        bed[rng.random(n) < 0.2] = np.nan
+        bath = rng.integers(1, 5, n).astype(float)
+        bath[rng.random(n) < 0.2] = np.nan
+        # A few unrealistic listings for the cleaning step to drop
+        bed[rng.random(n) < 0.001] = 99
+        state = states[rng.integers(0, len(states), n)].astype(object)
+        state[rng.random(n) < 0.0001] = None
+        frame = pd.DataFrame({
+            'brokered_by': rng.integers(1, 110_000, n),
+            'status': rng.choice(['for_sale', 'ready_to_build', 'sold'], n, p=[0.6, 0.01, 0.39]),
+            'price': price,
+            'bed': bed,
+            'bath': bath,
+            'acre_lot': rng.gamma(0.5, 1, n).round(2),
+            'street': rng.integers(1, 2_000_000, n),
+            'city': cities[rng.integers(0, len(cities), n)],
+            'state': state,
+            'zip_code': rng.integers(601, 99_999, n),
+            'house_size': rng.integers(400, 6_000, n),
+            'prev_sold_date': pd.to_datetime(rng.integers(0, 12_000, n), unit='D', origin='1990-01-01').strftime('%Y-%m-%d'),
+        })
+        frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return path
+
+
+def generate(directory, scale=1, seed=0):
+    """Write every dashboard's dataset into ``directory`` at ``scale`` times the base size.
+
+    Generation is skipped when the directory already holds a complete set for
+    the same scale and seed.
+    """
+    marker = os.path.join(directory, '.complete')
+    stamp = f'scale={scale} seed={seed}\n'
+    if os.path.exists(marker) and open(marker).read() == stamp:
+        return directory
+
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    write_transactions(directory, scale, rng)
+    write_movielens(directory, scale, rng)
+    write_temperatures(directory, scale, rng)
+    write_energy(directory, scale, rng)
+    write_realtor(directory, scale, rng)
+    with open(marker, 'w') as f:
+        f.write(stamp)
+    return directory
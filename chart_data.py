@@ -0,0 +1,22 @@
+import altair as alt
+
+# Raw-point charts (scatter plots) ship at most this many rows to the browser
+MAX_CHART_ROWS = 5000
+
+# Chart data is aggregated or downsampled before it reaches Altair, so its
+# 5000-row guard (which st.altair_chart bypasses as well) is turned off once
+# for the process rather than per call, which would race between sessions
+alt.data_transformers.disable_max_rows()
+
+
+def downsample(data, columns, max_rows=MAX_CHART_ROWS, seed=42):
+    """Keep only the charted ``columns`` and at most ``max_rows`` random rows."""
+    data = data[columns]
+    if len(data) > max_rows:
+        data = data.sample(n=max_rows, random_state=seed)
+    return data
+
+
+def spec(chart):
+    """Vega-Lite JSON of an Altair chart with its data inlined, ready for ``st.vega_lite_chart``."""
+    return chart.to_dict()
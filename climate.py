@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# Reference period for each city's monthly climatology, as in Berkeley Earth's
+# own anomalies; city-months without data in it use their whole record
+BASELINE_YEARS = (1951, 1980)
+
+
+def _mean(sums, counts, axis):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums.sum(axis=axis) / counts.sum(axis=axis)
+
+
+def build_temperature_cube(data):
+    """Lay the monthly city temperatures out as dense (city, year, month) arrays.
+
+    Returns a dict with the sorted city and country names, each city's country
+    (``city_country``, a position in ``countries``), every year from the first
+    to the last, and three arrays of shape (cities, years, 12): ``rows`` (the
+    records per cell, with or without a temperature), and ``sums`` and
+    ``counts`` of the recorded temperatures. ``anomaly`` holds each cell's
+    mean temperature minus its city's climatology for that calendar month.
+    """
+    keys = pd.MultiIndex.from_frame(data[['City', 'Country']].astype(str))
+    city_codes, city_keys = keys.factorize(sort=True)
+    city_country, countries = pd.factorize(city_keys.get_level_values(1), sort=True)
+
+    year = data['year'].to_numpy().astype(np.int64)
+    first_year = int(year.min())
+    years = np.arange(first_year, int(year.max()) + 1)
+    shape = (len(city_keys), len(years), 12)
+    cells = np.ravel_multi_index((city_codes, year - first_year, data['month'].to_numpy() - 1), shape)
+
+    temperature = data['AverageTemperature'].to_numpy(dtype=np.float64)
+    recorded = ~np.isnan(temperature)
+    size = np.prod(shape)
+    rows = np.bincount(cells, minlength=size).reshape(shape)
+    sums = np.bincount(cells[recorded], weights=temperature[recorded], minlength=size).reshape(shape)
+    counts = np.bincount(cells[recorded], minlength=size).reshape(shape)
+
+    # Climatology: the mean of each calendar month over the reference years
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cell_mean = sums / counts
+    cell_recorded = counts > 0
+    filled = np.where(cell_recorded, cell_mean, 0)
+    in_period = (years >= BASELINE_YEARS[0]) & (years <= BASELINE_YEARS[1])
+    baseline = _mean(filled[:, in_period], cell_recorded[:, in_period], axis=1)
+    baseline = np.where(np.isnan(baseline), _mean(filled, cell_recorded, axis=1), baseline)
+
+    return {
+        'cities': np.asarray(city_keys.get_level_values(0)),
+        'city_country': city_country,
+        'countries': np.asarray(countries),
+        'years': years,
+        'rows': rows.astype(np.int32),
+        'sums': sums,
+        'counts': counts.astype(np.int32),
+        'anomaly': cell_mean - baseline[:, None, :],
+    }
+
+
+def slice_cube(cube, min_year, max_year, countries):
+    """Cube cells for a year range and a set of countries.
+
+    Returns a dict with the selected ``cities`` (positions in the cube), their
+    ``years``, and the matching slices of ``rows``, ``sums``, ``counts`` and
+    ``anomaly``.
+    """
+    selected = np.isin(cube['countries'], list(countries))
+    cities = np.flatnonzero(selected[cube['city_country']])
+    years = slice(*np.searchsorted(cube['years'], [min_year, max_year + 1]))
+    return {
+        'cities': cities,
+        'years': cube['years'][years],
+        **{name: cube[name][cities, years] for name in ('rows', 'sums', 'counts', 'anomaly')},
+    }
+
+
+def summary(cube, cells):
+    """Number of cities, countries and records in a slice."""
+    present = cells['rows'].sum(axis=(1, 2)) > 0
+    return {
+        'cities': int(present.sum()),
+        'countries': len(np.unique(cube['city_country'][cells['cities'][present]])),
+        'records': int(cells['rows'].sum()),
+    }
+
+
+def yearly_means(cells):
+    """Mean temperature per year over every selected record."""
+    mean = _mean(cells['sums'], cells['counts'], axis=(0, 2))
+    present = cells['rows'].sum(axis=(0, 2)) > 0
+    return pd.DataFrame({'year': cells['years'][present], 'AverageTemperature': mean[present]})
+
+
+def monthly_means(cells):
+    """Mean temperature per calendar month over every selected record."""
+    mean = _mean(cells['sums'], cells['counts'], axis=(0, 1))
+    present = cells['rows'].sum(axis=(0, 1)) > 0
+    return pd.DataFrame({'month': np.arange(1, 13)[present], 'AverageTemperature': mean[present]})
+
+
+def country_means(cube, cells):
+    """Mean temperature per country over every selected record."""
+    country = cube['city_country'][cells['cities']]
+    n_countries = len(cube['countries'])
+    sums = np.bincount(country, weights=cells['sums'].sum(axis=(1, 2)), minlength=n_countries)
+    counts = np.bincount(country, weights=cells['counts'].sum(axis=(1, 2)), minlength=n_countries)
+    present = np.bincount(country, weights=cells['rows'].sum(axis=(1, 2)), minlength=n_countries) > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+    return pd.DataFrame({'Country': cube['countries'][present], 'AverageTemperature': mean[present]})
+
+
+def city_anomalies(cube, cells):
+    """Mean anomaly per city and year, one row per city-year with any data."""
+    recorded = ~np.isnan(cells['anomaly'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        anomaly = np.where(recorded, cells['anomaly'], 0).sum(axis=2) / recorded.sum(axis=2)
+    city, year = np.nonzero(recorded.any(axis=2))
+    return pd.DataFrame({
+        'year': cells['years'][year],
+        'Anomaly': anomaly[city, year],
+        'City': cube['cities'][cells['cities'][city]],
+        'Country': cube['countries'][cube['city_country'][cells['cities'][city]]],
+    })
+
+
+def city_box_stats(cube, cells):
+    """Minimum, quartiles and maximum of the monthly temperatures of each city."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly = (cells['sums'] / cells['counts']).reshape(len(cells['cities']), len(cells['years']) * 12)
+    present = (cells['counts'] > 0).any(axis=(1, 2))
+    stats = np.nanpercentile(monthly[present], [0, 25, 50, 75, 100], axis=1) if present.any() else np.empty((5, 0))
+    return pd.DataFrame({
+        'City': cube['cities'][cells['cities'][present]],
+        'min': stats[0],
+        'q1': stats[1],
+        'median': stats[2],
+        'q3': stats[3],
+        'max': stats[4],
+    })
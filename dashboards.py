@@ -0,0 +1,16 @@
+import streamlit as st
+
+# Serve every dashboard from one process, one page each. A page's script (and
+# its imports, e.g. matplotlib and seaborn for the e-commerce page) only runs
+# when the page is opened, and each dataset is loaded on the first visit to a
+# page that needs it, then shared by every page and session through
+# data_loader's process-wide cache.
+pages = [
+    st.Page('app.py', title='E-Commerce', icon=':material/shopping_cart:', url_path='ecommerce', default=True),
+    st.Page('app2.py', title='Movies', icon=':material/movie:', url_path='movies'),
+    st.Page('app3.py', title='Climate Change', icon=':material/public:', url_path='climate'),
+    st.Page('app4.py', title='Sustainable Energy', icon=':material/bolt:', url_path='energy'),
+    st.Page('app5.py', title='USA Real Estate', icon=':material/home:', url_path='real-estate'),
+]
+
+st.navigation(pages).run()
@@ -0,0 +1,373 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import climate
+import ecommerce
+import energy
+import filters
+import movielens
+import realtor
+import schemas
+import sidecar
+
+# Cached frames are handed to sessions as shallow copies, which only keep the
+# shared frame intact under Copy-on-Write; it is always on from pandas 3
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Process-wide memory budget for cached datasets (bytes)
+MEMORY_BUDGET = int(os.environ.get('DASHBOARD_CACHE_BYTES', 2 * 1024 ** 3))
+
+# Seconds between background checks of the cached datasets' source files; with
+# 0 there is no background refresh and an updated file is reloaded by the next
+# session that asks for it
+REFRESH_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', 30))
+
+# Dataset locations, relative to the directory the dashboards are run from
+TRANSACTIONS_PATH = 'data.csv'
+MOVIES_PATH = 'movies.dat'
+RATINGS_PATH = 'ratings.dat'
+USERS_PATH = 'users.dat'
+TEMPERATURES_PATH = 'GlobalLandTemperaturesByMajorCity.csv'
+ENERGY_PATH = 'global-data-on-sustainable-energy.csv'
+REALTOR_PATH = 'realtor-data.zip.csv'
+
+_cache = OrderedDict()
+_sizes = {}
+_cache_lock = threading.Lock()
+_load_locks = {}
+_builders = {}
+_refresher = None
+_refresh_state = threading.local()
+# Bumped whenever a cached version is replaced or dropped, see consistent()
+_generation = 0
+
+log = logging.getLogger(__name__)
+
+
+def _source_stamp(paths):
+    """Identify the current version of the source files by path, mtime and size."""
+    stamp = []
+    for path in paths:
+        stat = os.stat(path)
+        stamp.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def _nbytes(value):
+    """Estimate the resident size of a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _read_only(value):
+    """Hand out a view of a cached value that sessions can't mutate in place.
+
+    Frames are returned as shallow copies; with Copy-on-Write (pandas 2 with
+    the option set above, or pandas 3) any change, including ``.loc`` and
+    ``.iloc`` assignments, only touches the session's copy and never the
+    shared cached frame.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, dict):
+        return {k: _read_only(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_read_only(v) for v in value)
+    return value
+
+
+def _evict(keep):
+    """Drop least recently used entries until the cache fits the memory budget."""
+    total = sum(_sizes.values())
+    for key in list(_cache):
+        if total <= MEMORY_BUDGET:
+            break
+        if key in keep:
+            continue
+        total -= _sizes.pop(key)
+        del _cache[key]
+
+
+def _store(entries):
+    """Swap new versions into the cache in one step, dropping the versions they replace."""
+    global _generation
+    with _cache_lock:
+        for key, value in entries.items():
+            for stale in [k for k in _cache if k[0] == key[0] and k != key]:
+                _sizes.pop(stale)
+                del _cache[stale]
+                _generation += 1
+            _cache[key] = value
+            _sizes[key] = _nbytes(value)
+        _evict(keep=entries)
+
+
+def _remeasure(value):
+    """Update the recorded size of a cached value that grew after it was stored."""
+    with _cache_lock:
+        for key, cached in _cache.items():
+            if cached is value:
+                _sizes[key] = _nbytes(value)
+                _evict(keep=(key,))
+                return
+
+
+def _served(name, paths):
+    """Cached key of ``name`` for the same source paths, whatever their version."""
+    files = [os.path.abspath(path) for path in paths]
+    for key in _cache:
+        if key[0] == name and [entry[0] for entry in key[1]] == files:
+            return key
+    return None
+
+
+def cached_load(name, paths, build):
+    """Return ``build(*paths)``, parsed at most once per version of the source files.
+
+    Entries are keyed on ``name`` plus the path, mtime and size of every source
+    file, so an updated file is picked up and its stale entry is dropped. The
+    cache is shared by every session in the process. While the background
+    refresher runs, sessions keep getting the cached version of an updated
+    file until the refresher has rebuilt it off the request path.
+    """
+    try:
+        key = (name, _source_stamp(paths))
+    except OSError:
+        # A source being replaced is missing for a moment; keep serving the cached
+        # version, except to the refresher, which retries on its next check
+        with _cache_lock:
+            refreshing = getattr(_refresh_state, 'staged', None) is not None
+            served = _served(name, paths) if _refresher is not None and not refreshing else None
+            if served is None:
+                raise
+            _cache.move_to_end(served)
+            return _read_only(_cache[served])
+
+    # In the refresher thread, new versions are built aside and swapped in together
+    staged = getattr(_refresh_state, 'staged', None)
+    if staged is not None:
+        if key not in staged:
+            with _cache_lock:
+                cached = _cache.get(key)
+            staged[key] = cached if cached is not None else build(*paths)
+        return _read_only(staged[key])
+
+    with _cache_lock:
+        _builders[name] = paths, build
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _read_only(_cache[key])
+        # Loads nested in another build must see the files it was keyed on
+        nested = getattr(_refresh_state, 'building', False)
+        served = _served(name, paths) if _refresher is not None and not nested else None
+        if served is not None:
+            _cache.move_to_end(served)
+            return _read_only(_cache[served])
+        load_lock = _load_locks.setdefault(name, threading.Lock())
+
+    # Only one session parses a given dataset; the others wait for its result
+    with load_lock:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _read_only(_cache[key])
+
+        _refresh_state.building = True
+        try:
+            value = build(*paths)
+        finally:
+            _refresh_state.building = nested
+        _store({key: value})
+
+    _start_refresher()
+    return _read_only(value)
+
+
+def consistent(fetch):
+    """Return ``fetch()``, retried until no cached version was replaced while it ran.
+
+    Several loads made in one ``fetch`` (say a frame and a cube derived from
+    it, plus their ``dataset_version``) then all come from one served version,
+    even if the refresher swaps in a new one meanwhile.
+    """
+    while True:
+        with _cache_lock:
+            generation = _generation
+        result = fetch()
+        with _cache_lock:
+            if _generation == generation:
+                return result
+
+
+def dataset_version(paths):
+    """Version stamp of the dataset being served, for keying derived caches.
+
+    While the refresher runs, this is the version in the cache, which can lag
+    the files on disk until the refresher has swapped the new one in.
+    """
+    if _refresher is None:
+        return _source_stamp(paths)
+    with _cache_lock:
+        served = {entry[0]: entry for key in _cache for entry in key[1]}
+    # Files not cached yet are stat'ed, so a missing one still raises
+    return tuple(served.get(os.path.abspath(path)) or _source_stamp([path])[0] for path in paths)
+
+
+def _refresh(pending):
+    """Rebuild every cached dataset whose source files changed, then swap them in at once."""
+    with _cache_lock:
+        keys = list(_cache)
+        builders = dict(_builders)
+
+    due = []
+    for name, stamp in keys:
+        try:
+            current = _source_stamp([path for path, _, _ in stamp])
+        except OSError:
+            continue  # source missing, e.g. mid-replace; keep serving the cached version
+        if current == stamp:
+            pending.pop(name, None)
+        elif pending.get(name) != current:
+            # Wait until the file has stopped changing, so a copy in progress isn't read
+            pending[name] = current
+        elif name in builders:
+            due.append(name)
+
+    if not due:
+        return
+    _refresh_state.staged = {}
+    try:
+        for name in due:
+            paths, build = builders[name]
+            try:
+                cached_load(name, paths, build)
+            except Exception:
+                log.exception('Refreshing %s failed; serving the cached version', name)
+            pending.pop(name, None)
+        _store(_refresh_state.staged)
+    finally:
+        _refresh_state.staged = None
+
+
+def _refresh_loop(interval):
+    pending = {}
+    while True:
+        time.sleep(interval)
+        try:
+            _refresh(pending)
+        except Exception:
+            log.exception('Dataset refresh failed')
+
+
+def _start_refresher():
+    """Start the background refresher thread once per process."""
+    global _refresher
+    if REFRESH_INTERVAL <= 0 or _refresher is not None:
+        return
+    with _cache_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, args=(REFRESH_INTERVAL,), name='dataset-refresher', daemon=True)
+            _refresher.start()
+
+
+def clear_cache():
+    """Drop every cached dataset."""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
+        _sizes.clear()
+
+
+# Dataset parsers
+
+def _parse_transactions(path):
+    data = sidecar.read_csv(path, encoding='latin1', **schemas.TRANSACTIONS)
+    data['TotalPrice'] = data['Quantity'] * data['UnitPrice']
+    return data
+
+
+def _parse_movielens(movies_path, ratings_path, users_path):
+    # The three files are read concurrently; ratings.dat is itself split into
+    # byte ranges parsed in parallel
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        movies = pool.submit(sidecar.read, movies_path, movielens.read_dat, names=['MovieID', 'Title', 'Genres'], **schemas.MOVIES)
+        ratings = pool.submit(sidecar.read, ratings_path, movielens.read_dat, names=['UserID', 'MovieID', 'Rating', 'Timestamp'], **schemas.RATINGS)
+        users = pool.submit(sidecar.read, users_path, movielens.read_dat, names=['UserID', 'Gender', 'Age', 'Occupation', 'Zip-code'], **schemas.USERS)
+    movies_df, ratings_df, users_df = movies.result(), ratings.result(), users.result()
+
+    # Roll the ratings up into a cube instead of merging the three tables
+    genre_index = movielens.build_genre_index(movies_df)
+    rating_cube = movielens.build_rating_cube(movies_df, ratings_df, users_df)
+    return movies_df, users_df, genre_index, rating_cube
+
+
+def _parse_temperatures(path):
+    data = sidecar.read_csv(path, **schemas.TEMPERATURES)
+    data['year'] = data['dt'].dt.year.astype('int16')
+    data['month'] = data['dt'].dt.month.astype('int8')
+    return data
+
+
+def _parse_energy(path):
+    return sidecar.read_csv(path, encoding='latin1', **schemas.ENERGY)
+
+
+# Public loaders, one per dashboard, plus shared filter engines over their frames
+
+def load_transaction_rollups(path=TRANSACTIONS_PATH):
+    """Return the e-commerce rollups; the raw transactions are only held while building them."""
+    return cached_load('transactions.rollups', [path], lambda p: ecommerce.build_rollups(_parse_transactions(p)))
+
+
+def load_movielens(movies_path=MOVIES_PATH, ratings_path=RATINGS_PATH, users_path=USERS_PATH):
+    """Return ``(movies_df, users_df, genre_index, rating_cube)`` for the movies dashboard."""
+    return cached_load('movielens', [movies_path, ratings_path, users_path], _parse_movielens)
+
+
+def load_temperature_cube(path=TEMPERATURES_PATH):
+    """Return the climate dashboard's (city, year, month) arrays; the raw rows are only held while building them."""
+    return cached_load('temperatures.cube', [path], lambda p: climate.build_temperature_cube(_parse_temperatures(p)))
+
+
+def load_energy(path=ENERGY_PATH):
+    return cached_load('energy', [path], _parse_energy)
+
+
+def load_energy_cube(path=ENERGY_PATH):
+    """Return the energy dashboard's per-entity, per-year metric arrays."""
+    return cached_load('energy.cube', [path], lambda p: energy.build_energy_cube(load_energy(p)))
+
+
+def load_realtor(path=REALTOR_PATH):
+    """Return the streamed realtor summary (sample, per-state price sketches and the cleaned rows' path)."""
+    realtor_data = cached_load('realtor', [path], lambda p: realtor.stream_realtor(p, rows_path=realtor.rows_path(p)))
+    if realtor_data['rows_path'] is not None:
+        realtor.remove_superseded_rows(path, realtor_data['rows_path'])
+    return realtor_data
+
+
+def energy_filters(path=ENERGY_PATH):
+    return cached_load('energy.filters', [path], lambda p: filters.FilterEngine(load_energy(p), on_grow=_remeasure))
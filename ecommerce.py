@@ -0,0 +1,28 @@
+def build_rollups(data):
+    """Aggregate the transactions once into everything the e-commerce dashboard shows.
+
+    Daily revenue is rolled up from the transactions and monthly revenue from
+    the daily series. The product and country rankings are fully sorted, so a
+    top-N panel only needs ``head(n)``.
+    """
+    daily = data.resample('D', on='InvoiceDate')['TotalPrice'].sum()
+    # Month-end labels, as resample('M') produced
+    monthly = daily.groupby(daily.index.to_period('M')).sum()
+    monthly.index = monthly.index.to_timestamp(how='end').normalize()
+    monthly.index.name = 'InvoiceDate'
+
+    product_quantity = data.groupby('StockCode', observed=True).agg({'Quantity': 'sum'}).reset_index().sort_values(by='Quantity', ascending=False)
+    country_revenue = data.groupby('Country', observed=True).agg({'TotalPrice': 'sum'}).reset_index().sort_values(by='TotalPrice', ascending=False)
+    # Plain strings keep seaborn from drawing a bar slot for every category
+    product_quantity['StockCode'] = product_quantity['StockCode'].astype(str)
+    country_revenue['Country'] = country_revenue['Country'].astype(str)
+
+    return {
+        'total_revenue': float(data['TotalPrice'].sum()),
+        'total_orders': int(data['InvoiceNo'].nunique()),
+        'total_customers': int(data['CustomerID'].nunique()),
+        'daily_revenue': daily.reset_index(),
+        'monthly_revenue': monthly.reset_index(),
+        'product_quantity': product_quantity.reset_index(drop=True),
+        'country_revenue': country_revenue.reset_index(drop=True),
+    }
@@ -0,0 +1,132 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Metrics the energy dashboard charts, kept as dense (entity, year) arrays
+METRICS = [
+    'Access to electricity (% of population)',
+    'Access to clean fuels for cooking',
+    'Renewable-electricity-generating-capacity-per-capita',
+    'Financial flows to developing countries (US $)',
+]
+
+# With more entities selected than this, line charts draw the top entities
+# and summarize the rest as one band
+TOP_N = 10
+
+
+def _timestamps(years):
+    return pd.to_datetime(years.astype(str), format='%Y')
+
+
+def build_energy_cube(data):
+    """Lay the charted metrics out as dense (entity, year) arrays.
+
+    Returns a dict with the sorted entity names, every year from the first to
+    the last, each entity's ``latitude`` and ``longitude``, and ``metrics``
+    mapping each name in METRICS to a float array of shape (entities, years)
+    that is NaN where no value was reported.
+    """
+    entity_codes, entities = pd.factorize(data['Entity'].astype(str), sort=True)
+    year = data['Year'].dt.year.to_numpy()
+    first_year = int(year.min())
+    years = np.arange(first_year, int(year.max()) + 1)
+
+    metrics = {}
+    for metric in METRICS:
+        values = np.full((len(entities), len(years)), np.nan)
+        values[entity_codes, year - first_year] = data[metric].to_numpy(dtype=np.float64)
+        metrics[metric] = values
+
+    coordinates = data[['Latitude', 'Longitude']].groupby(entity_codes).first().reindex(range(len(entities)))
+    return {
+        'entities': np.asarray(entities),
+        'years': years,
+        'latitude': coordinates['Latitude'].to_numpy(dtype=np.float64),
+        'longitude': coordinates['Longitude'].to_numpy(dtype=np.float64),
+        'metrics': metrics,
+    }
+
+
+def slice_cube(cube, min_year, max_year, entities):
+    """Metric values for a year range and a set of entities.
+
+    Returns a dict with the selected ``entities`` (positions in the cube),
+    their ``years`` and the matching slice of every metric.
+    """
+    selected = np.flatnonzero(np.isin(cube['entities'], list(entities)))
+    years = slice(*np.searchsorted(cube['years'], [min_year, max_year + 1]))
+    return {
+        'entities': selected,
+        'years': cube['years'][years],
+        'metrics': {metric: values[selected, years] for metric, values in cube['metrics'].items()},
+    }
+
+
+def _long_series(cube, cells, metric, rows):
+    values = cells['metrics'][metric][rows]
+    row, year = np.nonzero(~np.isnan(values))
+    return pd.DataFrame({
+        'Year': _timestamps(cells['years'][year]),
+        'Entity': cube['entities'][cells['entities'][rows][row]],
+        metric: values[row, year],
+    })
+
+
+def top_series(cube, cells, metric, n=TOP_N):
+    """Yearly series of the ``n`` entities with the highest mean, plus a band for the rest.
+
+    Returns ``(top, rest)``: ``top`` has one row per entity and year with a
+    value; ``rest`` has the mean, 25th and 75th percentile of the remaining
+    entities per year, or is None when no more than ``n`` are selected.
+    """
+    values = cells['metrics'][metric]
+    if len(values) <= n:
+        return _long_series(cube, cells, metric, np.arange(len(values))), None
+
+    recorded = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(recorded, values, 0).sum(axis=1) / recorded.sum(axis=1)
+    order = np.argsort(-np.nan_to_num(means, nan=-np.inf), kind='stable')
+    top = _long_series(cube, cells, metric, order[:n])
+
+    others = values[order[n:]]
+    present = ~np.isnan(others).all(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanpercentile(others[:, present], [25, 75], axis=0)
+        mean = np.nanmean(others[:, present], axis=0)
+    rest = pd.DataFrame({
+        'Year': _timestamps(cells['years'][present]),
+        'Entity': f'Other {len(others)} (mean, 25th-75th percentile)',
+        'low': low,
+        metric: mean,
+        'high': high,
+    })
+    return top, rest
+
+
+def entity_totals(cube, cells, metric):
+    """Sum of ``metric`` over the selected years for each selected entity."""
+    return pd.DataFrame({
+        'Entity': cube['entities'][cells['entities']],
+        metric: np.nansum(cells['metrics'][metric], axis=1),
+    })
+
+
+def map_points(cube, cells, metric, year):
+    """One point per selected entity with coordinates and a value for ``metric`` in ``year``."""
+    column = int(np.searchsorted(cells['years'], year))
+    if column >= len(cells['years']) or cells['years'][column] != year:
+        return pd.DataFrame({'Entity': [], 'Latitude': [], 'Longitude': [], metric: []})
+    values = cells['metrics'][metric][:, column]
+    latitude = cube['latitude'][cells['entities']]
+    longitude = cube['longitude'][cells['entities']]
+    keep = ~(np.isnan(values) | np.isnan(latitude) | np.isnan(longitude))
+    return pd.DataFrame({
+        'Entity': cube['entities'][cells['entities'][keep]],
+        'Latitude': latitude[keep],
+        'Longitude': longitude[keep],
+        metric: values[keep],
+    })
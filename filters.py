@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Recent masks kept per column, so flipping a widget back and forth stays cached
+MASKS_PER_COLUMN = 8
+
+
+class FilterEngine:
+    """Evaluate dashboard filters over one frame with cached per-predicate masks.
+
+    Each predicate's boolean mask is cached by its column and widget value, so
+    a rerun where one widget changed only recomputes that widget's mask; the
+    rest are reused and combined with a cheap AND. Range predicates use a
+    sorted index of the column and binary search instead of comparing every
+    row. An engine is shared by every session looking at the same dataset.
+    ``on_grow(engine)`` is called after an index or mask is added, so a cache
+    holding the engine can re-measure it.
+    """
+
+    def __init__(self, data, on_grow=None):
+        self.data = data
+        self._sorted = {}
+        self._masks = {}
+        self._lock = threading.Lock()
+        self._on_grow = on_grow
+
+    def __sizeof__(self):
+        with self._lock:
+            index_bytes = sum(order.nbytes + values.nbytes for order, values in self._sorted.values())
+            mask_bytes = sum(mask.nbytes for masks in self._masks.values() for mask in masks.values())
+        return object.__sizeof__(self) + index_bytes + mask_bytes
+
+    def _grew(self):
+        # Called without holding the engine's lock, since on_grow measures the engine
+        if self._on_grow is not None:
+            self._on_grow(self)
+
+    def _cached(self, column, key, compute):
+        with self._lock:
+            masks = self._masks.setdefault(column, OrderedDict())
+            if key in masks:
+                masks.move_to_end(key)
+                return masks[key]
+        mask = compute()
+        mask.flags.writeable = False
+        with self._lock:
+            masks[key] = mask
+            while len(masks) > MASKS_PER_COLUMN:
+                masks.popitem(last=False)
+        self._grew()
+        return mask
+
+    def _sorted_column(self, column):
+        with self._lock:
+            if column in self._sorted:
+                return self._sorted[column]
+        values = self.data[column].to_numpy()
+        order = np.argsort(values, kind='stable')
+        index = order, values[order]
+        with self._lock:
+            self._sorted[column] = index
+        self._grew()
+        return index
+
+    def between(self, column, lo, hi):
+        """Mask of rows with ``lo <= column <= hi``."""
+        def compute():
+            order, values = self._sorted_column(column)
+            bounds = np.array([lo, hi], dtype=values.dtype)
+            start = np.searchsorted(values, bounds[0], side='left')
+            stop = np.searchsorted(values, bounds[1], side='right')
+            mask = np.zeros(len(values), dtype=bool)
+            mask[order[start:stop]] = True
+            return mask
+        return self._cached(column, ('between', lo, hi), compute)
+
+    def isin(self, column, values):
+        """Mask of rows whose ``column`` is one of ``values``."""
+        values = frozenset(values)
+        return self._cached(column, ('isin', values), lambda: self.data[column].isin(values).to_numpy())
+
+    def select(self, *masks):
+        """Rows of the frame where every mask is true."""
+        if not masks:
+            return self.data
+        return self.data[np.logical_and.reduce(masks)]
@@ -0,0 +1,120 @@
+"""Per-rerun stage timings for the dashboards.
+
+Each app creates a ``RerunTimer`` at the top of the script, wraps its stages
+in ``timer.stage(...)`` and calls ``timer.finish()`` at the end. Every stage
+records wall time, rows in/out and the change in resident memory.
+
+Set DASHBOARD_TIMING_LOG to a file path to append one JSON line per stage;
+``python instrument.py LOG`` turns such a log into percentile reports. Set
+DASHBOARD_TIMING_PANEL=1, or open the app with ``?timings=1``, to show the
+timings of the current rerun in a collapsible sidebar panel.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+LOG_PATH = os.environ.get('DASHBOARD_TIMING_LOG')
+SHOW_PANEL = os.environ.get('DASHBOARD_TIMING_PANEL') == '1'
+
+_log_lock = threading.Lock()
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / 1024 ** 2 if hasattr(os, 'sysconf') else None
+
+
+def _rss_mb():
+    """Current resident memory, read from /proc (cheap, Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, TypeError):
+        return None
+
+
+class RerunTimer:
+    """Collect the stage timings of one script run."""
+
+    def __init__(self, app):
+        self.app = app
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time a named stage; set ``record['rows_out']`` inside the block to log output rows."""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_ms'] = (time.perf_counter() - started) * 1000
+            rss_after = _rss_mb()
+            record['rss_delta_mb'] = rss_after - rss_before if rss_before is not None else None
+            self.stages.append(record)
+
+    def finish(self):
+        """Write the log lines and, if enabled, the sidebar panel for this rerun."""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        if LOG_PATH:
+            self._write_log(total_ms)
+        if SHOW_PANEL or _panel_requested():
+            self._show_panel(total_ms)
+
+    def _write_log(self, total_ms):
+        now = time.time()
+        base = {'ts': now, 'app': self.app, 'run_id': self.run_id}
+        lines = [json.dumps({**base, **record}) for record in self.stages]
+        lines.append(json.dumps({**base, 'stage': 'total', 'wall_ms': total_ms}))
+        with _log_lock, open(LOG_PATH, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def _show_panel(self, total_ms):
+        import streamlit as st
+
+        with st.sidebar.expander(f'Rerun timings ({total_ms:,.0f} ms)', expanded=False):
+            st.dataframe(
+                [{
+                    'Stage': record['stage'],
+                    'ms': round(record['wall_ms'], 1),
+                    'Rows in': record['rows_in'],
+                    'Rows out': record['rows_out'],
+                    'Mem Δ (MB)': None if record['rss_delta_mb'] is None else round(record['rss_delta_mb'], 1),
+                } for record in self.stages],
+                hide_index=True,
+            )
+
+
+def _panel_requested():
+    import streamlit as st
+
+    try:
+        return st.query_params.get('timings') == '1'
+    except Exception:  # no script run context, e.g. imported outside streamlit
+        return False
+
+
+def report(path, percentiles=(50, 95, 99)):
+    """Percentile wall times per (app, stage) from a timing log, as printable lines."""
+    import numpy as np
+
+    timings = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            timings.setdefault((record['app'], record['stage']), []).append(record['wall_ms'])
+
+    header = f"{'app':<10}{'stage':<32}{'runs':>6}" + ''.join(f'{f"p{p} ms":>11}' for p in percentiles)
+    lines = [header]
+    for (app, stage), values in sorted(timings.items()):
+        cells = ''.join(f'{v:>11.1f}' for v in np.percentile(values, percentiles))
+        lines.append(f'{app:<10}{stage:<32}{len(values):>6}{cells}')
+    return lines
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print('\n'.join(report(path)))
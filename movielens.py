@@ -0,0 +1,174 @@
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Age groups used by the ratings-by-age panel
+AGE_BINS = [0, 18, 25, 35, 45, 50, 56, 60, 100]
+AGE_LABELS = ['0-18', '19-25', '26-35', '36-45', '46-50', '51-56', '57-60', '60+']
+
+# MovieLens ratings are whole stars from 1 to 5
+RATING_VALUES = np.arange(1, 6)
+
+# Fields in the .dat files are separated by '::', which only pandas' python
+# engine accepts. read_dat rewrites it to the ASCII unit separator, which
+# never occurs in the data, so the much faster C engine can parse the files.
+DAT_SEPARATOR = b'::'
+_UNIT_SEPARATOR = b'\x1f'
+
+# Files are parsed in byte ranges of at least this size, one per thread
+MIN_CHUNK_BYTES = 4 * 1024 ** 2
+
+
+def _line_chunks(raw, n_chunks):
+    """Split ``raw`` into up to ``n_chunks`` pieces that end on line boundaries."""
+    step = max(len(raw) // n_chunks, 1)
+    chunks, start = [], 0
+    while start < len(raw):
+        stop = raw.find(b'\n', start + step)
+        stop = len(raw) if stop < 0 else stop + 1
+        chunks.append(raw[start:stop])
+        start = stop
+    return chunks
+
+
+def read_dat(path, names, dtype=None, encoding='latin1', workers=None):
+    """Read a MovieLens ``.dat`` file, parsing byte ranges of it in parallel threads.
+
+    The C parser drops the GIL while tokenizing, so threads overlap on large
+    files such as ratings.dat. Category columns are parsed as strings per
+    range and converted once the ranges are joined, so every row shares one
+    set of categories.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read().replace(DAT_SEPARATOR, _UNIT_SEPARATOR)
+
+    dtype = dict(dtype or {})
+    categories = [column for column, kind in dtype.items() if kind == 'category']
+    chunk_dtype = {**dtype, **{column: str for column in categories}}
+
+    def parse(chunk):
+        return pd.read_csv(io.BytesIO(chunk), sep=_UNIT_SEPARATOR.decode(), header=None, names=names,
+                           dtype=chunk_dtype, encoding=encoding, quoting=csv.QUOTE_NONE)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = _line_chunks(raw, max(1, min(workers, len(raw) // MIN_CHUNK_BYTES)))
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(len(chunks)) as pool:
+            frame = pd.concat(pool.map(parse, chunks), ignore_index=True)
+    else:
+        frame = parse(raw)
+    return frame.astype({column: 'category' for column in categories})
+
+
+def build_genre_index(movies_df):
+    """Encode each movie's genres once as an integer bitmask.
+
+    Returns a dict with the sorted genre names, the bit assigned to each
+    genre, a ``masks`` lookup array indexed directly by MovieID, and the
+    number of movies per genre. MovieLens has 18 genres, well within the
+    63 bits an int64 mask can hold.
+    """
+    dummies = movies_df['Genres'].str.get_dummies('|')
+    genres = list(dummies.columns)
+    bits = np.left_shift(1, np.arange(len(genres), dtype=np.int64))
+    movie_masks = dummies.to_numpy(dtype=np.int64) @ bits
+
+    masks = np.zeros(movies_df['MovieID'].max() + 1, dtype=np.int64)
+    masks[movies_df['MovieID'].to_numpy()] = movie_masks
+    return {
+        'genres': genres,
+        'bits': dict(zip(genres, bits.tolist())),
+        'masks': masks,
+        'counts': dummies.sum().sort_values(ascending=False),
+    }
+
+
+def movies_matching(genre_index, selected_genres):
+    """Boolean array indexed by MovieID: True where a movie has any selected genre."""
+    selected = 0
+    for genre in selected_genres:
+        selected |= genre_index['bits'][genre]
+    return (genre_index['masks'] & selected) != 0
+
+
+def build_rating_cube(movies_df, ratings_df, users_df):
+    """Count ratings per (MovieID, age group, rating value) without merging the tables.
+
+    ``counts[movie_id, age_group, rating - 1]`` is the number of such ratings.
+    Ratings whose movie or user is unknown are left out, matching the inner
+    merge the dashboard used to build. The headline totals are kept over all
+    of ``ratings_df``.
+    """
+    n_movies = movies_df['MovieID'].max() + 1
+    known_movie = np.zeros(n_movies, dtype=bool)
+    known_movie[movies_df['MovieID'].to_numpy()] = True
+
+    age_group = pd.cut(users_df['Age'], bins=AGE_BINS, labels=AGE_LABELS, right=False).cat.codes.to_numpy()
+    user_group = np.full(users_df['UserID'].max() + 1, -1, dtype=np.int64)
+    user_group[users_df['UserID'].to_numpy()] = age_group
+
+    movie_ids = ratings_df['MovieID'].to_numpy()
+    user_ids = ratings_df['UserID'].to_numpy()
+    ratings = ratings_df['Rating'].to_numpy()
+
+    keep = (movie_ids < n_movies) & (user_ids < len(user_group))
+    keep &= (ratings >= RATING_VALUES[0]) & (ratings <= RATING_VALUES[-1])
+    movie_ids, user_ids, ratings = movie_ids[keep], user_ids[keep], ratings[keep]
+    groups = user_group[user_ids]
+    keep = known_movie[movie_ids] & (groups >= 0)
+
+    shape = (n_movies, len(AGE_LABELS), len(RATING_VALUES))
+    cells = np.ravel_multi_index((movie_ids[keep], groups[keep], ratings[keep] - RATING_VALUES[0]), shape)
+    counts = np.bincount(cells, minlength=np.prod(shape)).reshape(shape)
+
+    titles = np.empty(n_movies, dtype=object)
+    titles[movies_df['MovieID'].to_numpy()] = movies_df['Title'].to_numpy()
+    return {
+        'counts': counts.astype(np.int32),
+        'titles': titles,
+        'total_ratings': int(ratings_df['Rating'].count()),
+        'average_rating': float(ratings_df['Rating'].mean()),
+    }
+
+
+def slice_cube(rating_cube, movie_mask, min_rating, max_rating):
+    """Cube cells for the selected movies and rating range.
+
+    Returns ``(counts, values)`` where ``values`` holds the rating value of
+    each remaining cell along the last axis.
+    """
+    lo, hi = min_rating - RATING_VALUES[0], max_rating - RATING_VALUES[0] + 1
+    counts = rating_cube['counts'][:, :, lo:hi] * movie_mask[:, None, None]
+    return counts, RATING_VALUES[lo:hi]
+
+
+def _rating_means(counts, values):
+    rating_count = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts @ values / rating_count, rating_count
+
+
+def top_rated(rating_cube, counts, values, min_count=10, n=10):
+    """Best average ratings among movies with more than ``min_count`` ratings."""
+    mean, rating_count = _rating_means(counts.sum(axis=1), values)
+    top = np.flatnonzero(rating_count > min_count)
+    top = top[np.argsort(-mean[top], kind='stable')[:n]]
+    return pd.DataFrame({
+        'Title': rating_cube['titles'][top],
+        'Rating': mean[top],
+        'RatingCount': rating_count[top],
+    })
+
+
+def ratings_by_age_group(counts, values):
+    """Average rating and rating count for every age group."""
+    mean, rating_count = _rating_means(counts.sum(axis=0), values)
+    return pd.DataFrame({
+        'AgeGroup': pd.Categorical(AGE_LABELS, categories=AGE_LABELS, ordered=True),
+        'Rating': mean,
+        'RatingCount': rating_count,
+    })
@@ -0,0 +1,169 @@
+"""Filtered group-bys over a columnar (Parquet) file, run out of core.
+
+Only the small result frames reach pandas. DuckDB runs a query on every core
+and spills to disk past DASHBOARD_QUERY_MEMORY; without it, pyarrow scans the
+file batch by batch on its thread pool and merges partial aggregates. Set
+DASHBOARD_QUERY_BACKEND to pick one explicitly.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; pyarrow runs the same queries
+    duckdb = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # without pyarrow there are no columnar files to query
+    pa = None
+
+# DuckDB's memory cap per process; larger intermediates spill to QUERY_TEMP_DIR
+QUERY_MEMORY = os.environ.get('DASHBOARD_QUERY_MEMORY', '1GB')
+QUERY_TEMP_DIR = os.environ.get('DASHBOARD_QUERY_TEMP_DIR', '.tmp')
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def available():
+    """Whether columnar files can be written and queried in this environment."""
+    return pa is not None
+
+
+class RowWriter:
+    """Append pandas chunks to a Parquet file, published with a rename once complete.
+
+    Readers keep seeing the previous file, if any, until ``close``; ``abort``
+    drops the partial file instead.
+    """
+
+    def __init__(self, path, dtypes):
+        self.path = path
+        self._tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self._schema = pa.schema([(name, pa.string() if dtype is str else pa.from_numpy_dtype(np.dtype(dtype)))
+                                  for name, dtype in dtypes.items()])
+        self._writer = pq.ParquetWriter(self._tmp, self._schema)
+
+    def write(self, chunk):
+        self._writer.write_table(pa.Table.from_pandas(chunk[self._schema.names], schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._writer.close()
+        os.remove(self._tmp)
+
+
+def read_frames(path, batch_size):
+    """Rows of a Parquet file as pandas frames of at most ``batch_size`` rows."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+def _where(between, isin):
+    """SQL predicate and parameters for ``lo <= column <= hi`` and ``column IN values`` filters."""
+    clauses, params = [], []
+    for column, (lo, hi) in between.items():
+        clauses.append(f'"{column}" BETWEEN ? AND ?')
+        params += [lo, hi]
+    for column, values in isin.items():
+        clauses.append(f'list_contains(?, "{column}")')
+        params.append(list(values))
+    return ' AND '.join(clauses) or 'TRUE', params
+
+
+def _cursor():
+    # One database per process; each query runs on its own cursor, so sessions don't share state
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = duckdb.connect(config={'memory_limit': QUERY_MEMORY, 'temp_directory': QUERY_TEMP_DIR})
+        return _connection.cursor()
+
+
+def _duckdb_group_means(path, by, columns, between, isin, limit):
+    where, params = _where(between, isin)
+    means = ''.join(f', avg("{c}") AS "{c}"' for c in columns)
+    keys = ', '.join(f'"{c}"' for c in by)
+    sql = (f'SELECT {keys}{means}, count(*) AS listings FROM read_parquet(?) WHERE {where} '
+           f'GROUP BY {keys} ORDER BY listings DESC, {keys}')
+    if limit is not None:
+        sql += f' LIMIT {int(limit)}'
+    with _cursor() as cursor:
+        return cursor.execute(sql, [path, *params]).df()
+
+
+def _duckdb_summary(path, column, between, isin):
+    where, params = _where(between, isin)
+    sql = f'SELECT count("{column}"), avg("{column}"), median("{column}") FROM read_parquet(?) WHERE {where}'
+    with _cursor() as cursor:
+        count, mean, median = cursor.execute(sql, [path, *params]).fetchone()
+    return {'count': count, 'mean': np.nan if mean is None else mean, 'median': np.nan if median is None else median}
+
+
+def _expression(schema, between, isin):
+    expression = None
+    for column, (lo, hi) in between.items():
+        term = (ds.field(column) >= lo) & (ds.field(column) <= hi)
+        expression = term if expression is None else expression & term
+    for column, values in isin.items():
+        term = ds.field(column).isin(pa.array(list(values), type=schema.field(column).type))
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _arrow_group_means(path, by, columns, between, isin, limit):
+    # Aggregate each batch on its own and merge the (small) partial sums and counts
+    dataset = ds.dataset(path)
+    scanner = dataset.scanner(columns=by + columns, filter=_expression(dataset.schema, between, isin), use_threads=True)
+    aggregates = [(c, 'sum') for c in columns] + [([], 'count_all')]
+    partials = [
+        pa.Table.from_batches([batch]).group_by(by).aggregate(aggregates).to_pandas()
+        for batch in scanner.to_batches() if batch.num_rows
+    ]
+    if not partials:
+        return pd.DataFrame(columns=by + columns + ['listings'])
+    totals = pd.concat(partials, ignore_index=True).groupby(by, sort=False).sum().reset_index()
+    result = totals[by].assign(**{c: totals[f'{c}_sum'] / totals['count_all'] for c in columns}, listings=totals['count_all'])
+    result = result.sort_values(['listings', *by], ascending=[False] + [True] * len(by), ignore_index=True)
+    return result if limit is None else result.head(limit)
+
+
+def _arrow_summary(path, column, between, isin):
+    # Only the one filtered column is read into memory
+    dataset = ds.dataset(path)
+    values = dataset.to_table(columns=[column], filter=_expression(dataset.schema, between, isin), use_threads=True)[column]
+    values = pc.drop_null(values).to_numpy()
+    if not len(values):
+        return {'count': 0, 'mean': np.nan, 'median': np.nan}
+    return {'count': len(values), 'mean': float(values.mean()), 'median': float(np.median(values))}
+
+
+BACKENDS = {
+    'duckdb': (_duckdb_group_means, _duckdb_summary),
+    'arrow': (_arrow_group_means, _arrow_summary),
+}
+BACKEND = os.environ.get('DASHBOARD_QUERY_BACKEND', 'duckdb' if duckdb is not None else 'arrow')
+
+
+def group_means(path, by, columns, between=None, isin=None, limit=None):
+    """Mean of ``columns`` and row count (``listings``) per group of ``by`` over the filtered rows.
+
+    ``between`` maps columns to inclusive ``(lo, hi)`` ranges and ``isin`` maps
+    columns to allowed values. Groups come largest first, at most ``limit``.
+    """
+    return BACKENDS[BACKEND][0](path, list(by), list(columns), between or {}, isin or {}, limit)
+
+
+def summary(path, column, between=None, isin=None):
+    """Exact count, mean and median of ``column`` over the filtered rows."""
+    return BACKENDS[BACKEND][1](path, column, between or {}, isin or {})
@@ -0,0 +1,223 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import query
+import schemas
+import sketches
+
+# Only the columns the real estate dashboard uses are read from the 178 MB source
+REALTOR_COLUMNS = ['price', 'bed', 'bath', 'state', 'city']
+CHUNK_SIZE = 250_000
+SAMPLE_SIZE = 100_000
+
+# The cleaned rows are written next to the source for out-of-core queries, one
+# file per source version, e.g. realtor-data.zip.csv.<mtime_ns>-<size>.rows.parquet
+ROWS_SUFFIX = '.rows.parquet'
+
+# Prices are kept between 0 and 1e8; 1024 log bins give about 2% wide bins
+PRICE_EDGES = sketches.log_edges(1, 1e8, 1024)
+
+
+def _clean(chunk):
+    chunk['price'] = pd.to_numeric(chunk['price'], errors='coerce')
+    chunk['bed'] = pd.to_numeric(chunk['bed'], errors='coerce')
+    chunk['bath'] = pd.to_numeric(chunk['bath'], errors='coerce')
+    chunk['state'] = chunk['state'].fillna('Unknown')
+    chunk['city'] = chunk['city'].fillna('Unknown')
+
+    # Handle missing values for prices, beds, and baths
+    chunk = chunk.dropna(subset=['price', 'bed', 'bath'])
+
+    # Remove unrealistic prices, beds, and baths
+    return chunk[
+        (chunk['price'] > 0) & (chunk['price'] < 1e8)
+        & (chunk['bed'] > 0) & (chunk['bed'] < 10)
+        & (chunk['bath'] >= 0) & (chunk['bath'] < 10)
+    ]
+
+
+def rows_path(path):
+    """Where the cleaned rows of the current version of ``path`` are kept."""
+    stat = os.stat(path)
+    return f'{path}.{stat.st_mtime_ns}-{stat.st_size}{ROWS_SUFFIX}'
+
+
+def remove_superseded_rows(path, served_rows_path):
+    """Delete the rows files of older versions of ``path`` once its current version is served."""
+    try:
+        if served_rows_path != rows_path(path):
+            return  # the current version isn't swapped in yet
+    except OSError:
+        return
+    for stale in glob.glob(f'{glob.escape(path)}.*{ROWS_SUFFIX}'):
+        if stale != served_rows_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def _source_chunks(path, chunksize, rows_path):
+    # Rows already cleaned for this version are read back instead of parsing the text
+    if rows_path and query.available() and os.path.exists(rows_path):
+        return query.read_frames(rows_path, chunksize), None
+    reader = pd.read_csv(path, usecols=REALTOR_COLUMNS, chunksize=chunksize, **schemas.REALTOR)
+    writer = query.RowWriter(rows_path, schemas.REALTOR_ROWS) if rows_path and query.available() else None
+    return (_clean(chunk) for chunk in reader), writer
+
+
+def stream_realtor(path, chunksize=CHUNK_SIZE, sample_size=SAMPLE_SIZE, seed=42, rows_path=None):
+    """Clean the realtor dataset chunk by chunk without holding it in memory.
+
+    Returns a dict with a uniform random ``sample`` of at most ``sample_size``
+    cleaned rows, the observed price range, and per-state price histograms
+    (``price_counts`` and ``price_sums``, one row per entry of ``states``)
+    from which exact counts and sums and approximate medians can be read for
+    any set of states. With ``rows_path`` (and pyarrow), every cleaned row is
+    also written there as Parquet, or read back from it if it already exists,
+    and ``rows_path`` is returned for queries.
+    """
+    rng = np.random.default_rng(seed)
+    state_rows = {}
+    bins = len(PRICE_EDGES) - 1
+    price_counts = np.zeros((0, bins))
+    price_sums = np.zeros((0, bins))
+    price_min, price_max = np.inf, -np.inf
+    sample = None
+    chunks, writer = _source_chunks(path, chunksize, rows_path)
+
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if writer is not None:
+                writer.write(chunk)
+            prices = chunk['price'].to_numpy()
+            price_min = min(price_min, prices.min())
+            price_max = max(price_max, prices.max())
+
+            # Map the chunk's states onto stable sketch rows, growing the sketches for new states
+            codes, uniques = pd.factorize(chunk['state'])
+            rows = np.array([state_rows.setdefault(state, len(state_rows)) for state in uniques])[codes]
+            if len(state_rows) > len(price_counts):
+                grow = len(state_rows) - len(price_counts)
+                price_counts = np.vstack([price_counts, np.zeros((grow, bins))])
+                price_sums = np.vstack([price_sums, np.zeros((grow, bins))])
+            price_counts += sketches.grouped_histogram(rows, prices, PRICE_EDGES, len(state_rows))
+            price_sums += sketches.grouped_histogram(rows, prices, PRICE_EDGES, len(state_rows), weights=prices)
+
+            # Bottom-k sampling: keeping the rows with the smallest random keys is a uniform sample
+            chunk = chunk.assign(_key=rng.random(len(chunk)))
+            sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+            if len(sample) > sample_size:
+                sample = sample.nsmallest(sample_size, '_key')
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.close()
+
+    if sample is None:
+        sample = pd.DataFrame(columns=REALTOR_COLUMNS)
+    else:
+        sample = sample[REALTOR_COLUMNS].reset_index(drop=True)
+    sample = sample.astype(schemas.REALTOR_SAMPLE)
+
+    return {
+        'sample': sample,
+        'states': list(state_rows),
+        'price_min': price_min,
+        'price_max': price_max,
+        # Clip the edges to the observed range so a full-range selection covers whole bins
+        'price_edges': np.clip(PRICE_EDGES, price_min, price_max),
+        'price_counts': price_counts,
+        'price_sums': price_sums,
+        'rows_path': rows_path if rows_path and query.available() else None,
+    }
+
+
+def _rows(realtor_data):
+    # Another process may already have removed the rows of a superseded version;
+    # the sketches and sample of that version then stand in for them
+    path = realtor_data['rows_path']
+    return path if path is not None and os.path.exists(path) else None
+
+
+def _filters(selected_states, min_price, max_price):
+    return {'between': {'price': (min_price, max_price)}, 'isin': {'state': list(selected_states)}}
+
+
+def price_summary(realtor_data, selected_states, min_price, max_price):
+    """Listing count, mean price and median price for the selection.
+
+    Exact when the cleaned rows were written, otherwise read from the
+    per-state sketches with an approximate median.
+    """
+    rows_file = _rows(realtor_data)
+    if rows_file is not None:
+        return query.summary(rows_file, 'price', **_filters(selected_states, min_price, max_price))
+
+    state_rows = {state: row for row, state in enumerate(realtor_data['states'])}
+    rows = [state_rows[state] for state in selected_states if state in state_rows]
+    weights = sketches.range_weights(realtor_data['price_edges'], min_price, max_price)
+    counts = realtor_data['price_counts'][rows].sum(axis=0) * weights
+    sums = realtor_data['price_sums'][rows].sum(axis=0) * weights
+
+    count = counts.sum()
+    return {
+        'count': int(round(count)),
+        'mean': sums.sum() / count if count else np.nan,
+        'median': sketches.quantile(counts, realtor_data['price_edges'], 0.5),
+    }
+
+
+def price_histogram(realtor_data, selected_states, min_price, max_price, bins=100):
+    """Equal-width price histogram of the selection, merged from the per-state sketches."""
+    state_rows = {state: row for row, state in enumerate(realtor_data['states'])}
+    rows = [state_rows[state] for state in selected_states if state in state_rows]
+    edges = np.linspace(min_price, max_price, bins + 1)
+    counts = sketches.rebin(realtor_data['price_counts'][rows].sum(axis=0), realtor_data['price_edges'], edges)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+
+def states_in_range(realtor_data, min_price, max_price):
+    """States with at least one listing in the price range, sorted by name."""
+    weights = sketches.range_weights(realtor_data['price_edges'], min_price, max_price)
+    in_range = realtor_data['price_counts'] @ weights > 0
+    return sorted(state for state, keep in zip(realtor_data['states'], in_range) if keep)
+
+
+def listings_by_state(realtor_data, selected_states, min_price, max_price):
+    """Number of listings in the price range for each selected state."""
+    rows_file = _rows(realtor_data)
+    if rows_file is not None:
+        return query.group_means(rows_file, ['state'], [], **_filters(selected_states, min_price, max_price))
+
+    weights = sketches.range_weights(realtor_data['price_edges'], min_price, max_price)
+    listings = realtor_data['price_counts'] @ weights
+    selected = set(selected_states)
+    states = [(state, count) for state, count in zip(realtor_data['states'], listings) if state in selected and count > 0]
+    return pd.DataFrame(states, columns=['state', 'listings'])
+
+
+def city_averages(realtor_data, selected_states, min_price, max_price, limit=None):
+    """Mean price, beds and baths per state and city for the selection, cities with most listings first.
+
+    Runs over every cleaned row when they were written, otherwise over the sample.
+    """
+    rows_file = _rows(realtor_data)
+    if rows_file is not None:
+        return query.group_means(rows_file, ['state', 'city'], ['price', 'bed', 'bath'],
+                                 **_filters(selected_states, min_price, max_price), limit=limit)
+
+    sample = realtor_data['sample']
+    selected = sample[sample['price'].between(min_price, max_price) & sample['state'].isin(selected_states)]
+    averages = selected.groupby(['state', 'city'], observed=True).agg(
+        price=('price', 'mean'), bed=('bed', 'mean'), bath=('bath', 'mean'), listings=('price', 'size'),
+    ).reset_index()
+    averages = averages.sort_values(['listings', 'state', 'city'], ascending=[False, True, True], ignore_index=True)
+    return averages if limit is None else averages.head(limit)
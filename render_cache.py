@@ -0,0 +1,53 @@
+import io
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+
+# Rendered PNGs kept per process; each is a few tens of KB
+MAX_RENDERS = 128
+
+_renders = OrderedDict()
+_renders_lock = threading.Lock()
+_render_locks = {}
+
+
+def _render(draw, figsize):
+    # A standalone Figure renders through Agg without touching pyplot's global
+    # figure registry, so concurrent sessions don't contend and nothing leaks
+    fig = Figure(figsize=figsize)
+    try:
+        draw(fig.subplots())
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png')
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+def render_png(key, draw, figsize=(12, 4)):
+    """Return the PNG bytes of the figure ``draw(ax)`` produces, cached by ``key``.
+
+    ``key`` must cover every input of ``draw`` (widget values and the data
+    version). ``draw`` only runs on a cache miss, so it is also the place
+    for any aggregation the figure needs.
+    """
+    with _renders_lock:
+        if key in _renders:
+            _renders.move_to_end(key)
+            return _renders[key]
+        render_lock = _render_locks.setdefault(key, threading.Lock())
+
+    with render_lock:
+        with _renders_lock:
+            if key in _renders:
+                return _renders[key]
+
+        png = _render(draw, figsize)
+
+        with _renders_lock:
+            _renders[key] = png
+            while len(_renders) > MAX_RENDERS:
+                evicted, _ = _renders.popitem(last=False)
+                _render_locks.pop(evicted, None)
+    return png
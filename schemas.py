@@ -0,0 +1,92 @@
+# Column types for every dataset the dashboards load. Repeated labels are
+# stored as categories, numbers are downcast to the narrowest type that holds
+# them, and dates are parsed once at load time (and kept parsed in the Arrow
+# sidecars). Money and large totals stay float64 so sums don't lose cents.
+
+TRANSACTIONS = {
+    'dtype': {
+        'InvoiceNo': 'category',
+        'StockCode': 'category',
+        'Description': 'category',
+        'Quantity': 'int32',
+        'UnitPrice': 'float64',
+        'CustomerID': 'float32',
+        'Country': 'category',
+    },
+    'parse_dates': ['InvoiceDate'],
+}
+
+MOVIES = {
+    'dtype': {'MovieID': 'int32', 'Genres': 'category'},
+}
+
+RATINGS = {
+    'dtype': {'UserID': 'int32', 'MovieID': 'int32', 'Rating': 'int8', 'Timestamp': 'int32'},
+}
+
+USERS = {
+    'dtype': {'UserID': 'int32', 'Gender': 'category', 'Age': 'int8', 'Occupation': 'int8', 'Zip-code': 'category'},
+}
+
+TEMPERATURES = {
+    'dtype': {
+        'AverageTemperature': 'float32',
+        'AverageTemperatureUncertainty': 'float32',
+        'City': 'category',
+        'Country': 'category',
+        'Latitude': 'category',
+        'Longitude': 'category',
+    },
+    'parse_dates': ['dt'],
+    'date_format': '%Y-%m-%d',
+}
+
+ENERGY = {
+    'dtype': {
+        'Entity': 'category',
+        'Access to electricity (% of population)': 'float32',
+        'Access to clean fuels for cooking': 'float32',
+        'Renewable-electricity-generating-capacity-per-capita': 'float32',
+        'Financial flows to developing countries (US $)': 'float64',
+        'Renewable energy share in the total final energy consumption (%)': 'float32',
+        'Electricity from fossil fuels (TWh)': 'float32',
+        'Electricity from nuclear (TWh)': 'float32',
+        'Electricity from renewables (TWh)': 'float32',
+        'Low-carbon electricity (% electricity)': 'float32',
+        'Primary energy consumption per capita (kWh/person)': 'float32',
+        'Energy intensity level of primary energy (MJ/$2017 PPP GDP)': 'float32',
+        'Value_co2_emissions_kt_by_country': 'float64',
+        'Renewables (% equivalent primary energy)': 'float32',
+        'gdp_growth': 'float32',
+        'gdp_per_capita': 'float32',
+        'Land Area(Km2)': 'float64',
+        'Latitude': 'float32',
+        'Longitude': 'float32',
+    },
+    'parse_dates': ['Year'],
+    'date_format': '%Y',
+}
+
+# The realtor file is streamed in chunks: labels are read as plain strings
+# (categories would differ from chunk to chunk) and the kept sample is
+# converted to REALTOR_SAMPLE once streaming is done.
+REALTOR = {
+    'dtype': {'state': str, 'city': str},
+}
+
+REALTOR_SAMPLE = {
+    'price': 'float64',
+    'bed': 'int8',
+    'bath': 'float32',
+    'state': 'category',
+    'city': 'category',
+}
+
+# The cleaned realtor rows as written for out-of-core queries
+REALTOR_ROWS = {
+    'price': 'float64',
+    'bed': 'int8',
+    'bath': 'float32',
+    'state': str,
+    'city': str,
+}
@@ -0,0 +1,85 @@
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it we always parse the text source
+    pa = None
+
+# Sidecars live next to their source, e.g. movies.dat -> movies.dat.arrow
+SIDECAR_SUFFIX = '.arrow'
+_METADATA_KEY = b'dashboard_source'
+
+
+def sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def _signature(path, parse, read_kwargs):
+    """Describe the source version, parser and parse options a sidecar was built from."""
+    stat = os.stat(path)
+    return json.dumps({
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'parser': f'{parse.__module__}.{parse.__qualname__}',
+        'read_kwargs': read_kwargs,
+    }, sort_keys=True, default=str).encode()
+
+
+def _read_sidecar(path, signature):
+    try:
+        table = feather.read_table(sidecar_path(path), memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(_METADATA_KEY) != signature:
+        return None
+    # split_blocks keeps numeric columns as views onto the memory-mapped file
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_sidecar(path, signature, frame):
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return  # mixed-type object columns can't be stored; keep parsing the text
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = signature
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file and rename, so readers never see a partial sidecar
+    target = sidecar_path(path)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    try:
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read(path, parse, **read_kwargs):
+    """Return ``parse(path, **read_kwargs)`` through a typed columnar sidecar.
+
+    The first call parses the text source and stores the result as an
+    uncompressed Arrow file next to it; later calls memory-map that file
+    instead. The sidecar is rebuilt whenever the source's size or mtime, the
+    parser or the parse options change.
+    """
+    if pa is None:
+        return parse(path, **read_kwargs)
+
+    signature = _signature(path, parse, read_kwargs)
+    frame = _read_sidecar(path, signature)
+    if frame is None:
+        frame = parse(path, **read_kwargs)
+        _write_sidecar(path, signature, frame)
+    return frame
+
+
+def read_csv(path, **read_kwargs):
+    """Drop-in for ``pd.read_csv`` that goes through a typed columnar sidecar."""
+    return read(path, pd.read_csv, **read_kwargs)
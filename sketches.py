@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def log_edges(lo, hi, bins):
+    """Geometrically spaced bin edges, giving every bin the same relative width."""
+    return np.geomspace(lo, hi, bins + 1)
+
+
+def bin_index(values, edges):
+    """Bin of each value; values outside the edges fall into the first or last bin."""
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+
+def grouped_histogram(codes, values, edges, n_groups, weights=None):
+    """Per-group bin counts (or sums of ``weights``), shape ``(n_groups, bins)``.
+
+    Histograms over the same edges merge by addition, so a sketch for any set
+    of groups is the sum of their rows.
+    """
+    bins = len(edges) - 1
+    cells = np.asarray(codes) * bins + bin_index(values, edges)
+    return np.bincount(cells, weights=weights, minlength=n_groups * bins).reshape(n_groups, bins)
+
+
+def range_weights(edges, lo, hi):
+    """Fraction of each bin inside ``[lo, hi]``, assuming values spread evenly within a bin."""
+    left, right = edges[:-1], edges[1:]
+    width = right - left
+    inside = (np.minimum(right, hi) - np.maximum(left, lo)).clip(0, None)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(width > 0, inside / width, (left >= lo) & (left <= hi))
+
+
+def quantile(counts, edges, q):
+    """Approximate ``q``-quantile of the values summarized by a histogram."""
+    total = counts.sum()
+    if total <= 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    target = q * total
+    i = min(int(np.searchsorted(cumulative, target, side='left')), len(counts) - 1)
+    before = cumulative[i - 1] if i else 0
+    fraction = (target - before) / counts[i] if counts[i] else 0
+    return edges[i] + fraction * (edges[i + 1] - edges[i])
+
+
+def rebin(counts, edges, new_edges):
+    """Redistribute histogram counts onto ``new_edges``, spreading each bin's count evenly across it.
+
+    Values outside ``new_edges`` are dropped, so this also restricts a sketch
+    to a range.
+    """
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    return np.diff(np.interp(new_edges, edges, cumulative))
@@ -0,0 +1,170 @@
+"""Precomputed default views of the dashboards.
+
+Most visits open a dashboard with its default filters. Each app computes its
+metrics, Vega-Lite chart specs and PNGs for that view once and stores them as
+a snapshot in the data directory; later default views are served from the
+snapshot without loading or aggregating anything. A changed filter, a
+changed source file or changed dashboard code (any deploy) falls back to live
+computation.
+
+The first default view computed by a live app writes the snapshot; run
+``python snapshot.py app.py app2.py ...`` from the data directory to write
+them ahead of time.
+"""
+import base64
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import data_loader
+
+SNAPSHOT_DIR = os.environ.get('DASHBOARD_SNAPSHOT_DIR', 'snapshots')
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+_code_version = None
+
+
+def snapshot_path(app):
+    return os.path.join(SNAPSHOT_DIR, f'{app}.json')
+
+
+def code_version():
+    """Hash of the dashboard code (every module next to this one), read once per process."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+            digest.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def _json_version(paths):
+    # Stored versions are compared after a JSON round trip, which turns tuples into lists
+    return json.loads(json.dumps(data_loader.dataset_version(paths)))
+
+
+def _encode(outputs):
+    # PNGs are stored inline as base64 so a snapshot is one self-contained file
+    return {name: {'png': base64.b64encode(value).decode()} if isinstance(value, bytes) else value
+            for name, value in outputs.items()}
+
+
+def _decode(outputs):
+    return {name: base64.b64decode(value['png']) if isinstance(value, dict) and set(value) == {'png'} else value
+            for name, value in outputs.items()}
+
+
+def _read(app):
+    """The stored snapshot of ``app``, parsed once per version of the file."""
+    path = snapshot_path(app)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _loaded_lock:
+        if app in _loaded and _loaded[app][0] == stamp:
+            return _loaded[app][1]
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+        stored['outputs'] = _decode(stored['outputs'])
+    except (OSError, ValueError, KeyError):
+        return None
+    with _loaded_lock:
+        _loaded[app] = stamp, stored
+    return stored
+
+
+def _write(app, stored):
+    # Write to a temporary file and rename, so readers never see a partial snapshot;
+    # an unwritable data directory just means no snapshot
+    target = snapshot_path(app)
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump({**stored, 'outputs': _encode(stored['outputs'])}, f)
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class DefaultView:
+    """Serve an app's default view from its snapshot while the source files and code are unchanged.
+
+    ``widgets`` returns the widget ranges and options the default view was
+    built with, and ``outputs`` returns everything the app draws: stored
+    values when the widgets are at their defaults, otherwise (or without a
+    current snapshot) the result of computing them live. Apps fetch their
+    datasets through ``load``, so a rerun sees one version of the data even
+    if it is refreshed meanwhile.
+    """
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = paths
+        self.version = _json_version(paths)
+        self.code = code_version()
+        stored = _read(app)
+        current = stored is not None and stored.get('version') == self.version and stored.get('code') == self.code
+        self._stored = stored if current else None
+        self._widgets = {}
+        self._data = None
+        self._refreshed = False
+
+    def widgets(self, compute):
+        """Widget ranges and options, e.g. slider bounds read from the data."""
+        if self._stored is not None:
+            return self._stored['widgets']
+        self._widgets = compute()
+        return self._widgets
+
+    def load(self, fetch):
+        """The rerun's datasets, from one call of ``fetch`` against a single served version.
+
+        Later calls in the same rerun return the same data. If the data was
+        refreshed since the rerun started, the snapshot no longer applies and
+        ``version`` becomes that of the loaded data.
+        """
+        if self._data is None:
+            self._data, version = data_loader.consistent(lambda: (fetch(), _json_version(self.paths)))
+            if version != self.version:
+                self.version, self._stored, self._refreshed = version, None, True
+        return self._data
+
+    def outputs(self, is_default, compute):
+        """The view's metrics, chart specs and images as a flat dict of JSON values and PNG bytes."""
+        if is_default and self._stored is not None:
+            return self._stored['outputs']
+        outputs = compute()
+        # Widgets may have come from the superseded snapshot, so don't store a mix
+        if is_default and not self._refreshed:
+            _write(self.app, {'version': self.version, 'code': self.code, 'widgets': self._widgets, 'outputs': outputs})
+        return outputs
+
+
+def main(apps, timeout=600):
+    """Run each app once headlessly with its default widgets, writing its snapshot."""
+    from streamlit.testing.v1 import AppTest
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    for app in apps:
+        path = snapshot_path(os.path.splitext(os.path.basename(app))[0])
+        if os.path.exists(path):
+            os.remove(path)
+        at = AppTest.from_file(os.path.join(repo_dir, os.path.basename(app)), default_timeout=timeout).run()
+        errors = [str(e.value) for e in at.exception]
+        print(f"{app}: {'failed: ' + errors[0] if errors else 'wrote ' + path}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])